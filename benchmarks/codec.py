@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# Compares decoding of large test case runs and test cases responses: the text-then-JSON decoding of
+# requests.Response.json(), each gat JSON codec decoding bytes, each codec followed by parsing into gat data classes,
+# and the incremental parser used for streamed responses, e.g.
+#
+#   poetry run python benchmarks/codec.py --items 5000 --runs 10
+#
+# Payloads are generated like the responses of the fake server (fake_server.py). The orjson codec is skipped unless
+# the "speedups" extra is installed.
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_server  # noqa: E402
+import gat  # noqa: E402
+import gat.parsing  # noqa: E402
+import gat.streaming  # noqa: E402
+import tabulate  # noqa: E402
+
+HEADERS = ["Payload", "Decoding", "MiB", "Median ms", "MiB/s"]
+
+
+def codecs() -> Dict[str, gat.GatJsonCodec]:
+    available = {"json": gat.GatJsonCodec()}
+    try:
+        available["orjson"] = gat.GatOrjsonCodec()
+    except ImportError:
+        pass
+    return available
+
+
+def payloads(items: int, padding: int) -> Dict[str, bytes]:
+    arguments = fake_server.parser().parse_args(
+        ["--test-cases", str(items), "--test-case-runs", str(items), "--padding", str(padding)]
+    )
+    api = fake_server.FakeGatApi(arguments)
+    query = {"page[size]": str(items)}
+    return {
+        name: json.dumps(api.route("GET", path, query, b"")[1]).encode("utf-8")
+        for name, path in [
+            ("test case runs", "/api/v1/applications/1/test_case_runs_batches/1/test_case_runs"),
+            ("test cases", "/api/v1/applications/1/test_cases"),
+        ]
+    }
+
+
+def chunks(body: bytes, size: int = 65536) -> Iterator[bytes]:
+    for start in range(0, len(body), size):
+        end = start + size
+        yield body[start:end]
+
+
+def measure(body: bytes, decode: Callable[[bytes], Any], runs: int) -> List[float]:
+    durations = []
+    for _ in range(runs):
+        # Garbage left by the previous run would otherwise be collected during this one
+        gc.collect()
+        start_time = time.perf_counter()
+        decode(body)
+        durations.append(time.perf_counter() - start_time)
+    return durations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000, help="Number of items in each payload.")
+    parser.add_argument("--padding", type=int, default=0, help="Size of extra attribute added to each item.")
+    parser.add_argument("--runs", type=int, default=10, help="Number of decodings of each payload.")
+    arguments = parser.parse_args()
+
+    parsers = {"test case runs": gat.parsing.parse_test_case_run, "test cases": gat.parsing.parse_test_case}
+    table = [HEADERS]
+    for name, body in payloads(arguments.items, arguments.padding).items():
+        parse = parsers[name]
+        decodings: Dict[str, Callable[[bytes], Any]] = {"text, then json": lambda body: json.loads(body.decode())}
+        for codec_name, codec in codecs().items():
+            decodings[codec_name] = codec.loads
+            decodings[f"{codec_name}, parsed"] = lambda body, codec=codec: [
+                parse(item) for item in codec.loads(body)["data"]
+            ]
+        decodings["streamed, parsed"] = lambda body: [
+            parse(item) for item in gat.streaming.iter_array_items(chunks(body))
+        ]
+        for decoding, decode in decodings.items():
+            median = statistics.median(measure(body, decode, arguments.runs))
+            size = len(body) / 2 ** 20
+            table.append([name, decoding, size, median * 1000, size / median])
+
+    print(tabulate.tabulate(table, headers="firstrow", floatfmt=".1f"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+
+# Local stand-in for the Global App Testing API, serving synthetic data in the JSON:API shapes used by gat.GatApi,
+# with configurable latency, payload size and error injection, e.g.
+#
+#   poetry run python benchmarks/fake_server.py --port 8000 --test-case-runs 20000 --latency 20 --error-rate 0.01
+#   poetry run python gat-cli.py --root http://127.0.0.1:8000/api/ -k benchmark list-applications
+#
+# Lists are paginated with page[number] and page[size] query parameters and links.next, GET responses carry an ETag.
+# Created and deleted resources are kept in memory only.
+
+import argparse
+import contextlib
+import hashlib
+import http.server
+import itertools
+import json
+import random
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+OUTCOMES = ["passed", "failed"]
+IMPORTANCES = ["Low", "Medium", "Critical"]
+COUNTRIES = [("PL", "Poland"), ("GB", "United Kingdom"), ("US", "United States"), ("IN", "India"), ("BR", "Brazil")]
+
+
+class FakeGatApi:
+    def __init__(self, arguments: argparse.Namespace):
+        self.arguments = arguments
+        self.padding = "x" * arguments.padding
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.applications = [str(application) for application in range(1, arguments.applications + 1)]
+        self.environments = {
+            application: [
+                self.environment(str(next(self.ids)), f"Environment {index}", f"https://{index}.example.com")
+                for index in range(arguments.environments)
+            ]
+            for application in self.applications
+        }
+        self.native_builds = {
+            application: [
+                self.native_build(str(next(self.ids)), f"Build {index}", f"build-{index}.apk")
+                for index in range(arguments.native_builds)
+            ]
+            for application in self.applications
+        }
+        self.test_cases = {
+            application: [
+                self.test_case(
+                    str(next(self.ids)), f"Test case {index}", IMPORTANCES[index % 3], f"Section {index % 10}", []
+                )
+                for index in range(arguments.test_cases)
+            ]
+            for application in self.applications
+        }
+        self.batches = {
+            application: [str(batch) for batch in range(1, arguments.batches + 1)] for application in self.applications
+        }
+
+    def attributes(self, **attributes: Any) -> Dict[str, Any]:
+        if self.padding:
+            attributes["description"] = self.padding
+        return attributes
+
+    def environment(self, id: str, name: str, url: str) -> Dict[str, Any]:
+        return {"type": "applicationEnvironment", "id": id, "attributes": self.attributes(name=name, url=url)}
+
+    def native_build(self, id: str, name: str, file_name: Optional[str], vendor_url: Optional[str] = None) -> Any:
+        attributes = self.attributes(
+            name=name, appFileOriginalFilename=file_name, externalVendorUrl=vendor_url, signingStatus="signed"
+        )
+        return {"type": "nativeApplicationBuild", "id": id, "attributes": attributes}
+
+    def test_case(self, id: str, title: str, importance: str, section: Optional[str], instructions: List[Any]) -> Any:
+        attributes = self.attributes(title=title, importance=importance, section=section, instructions=instructions)
+        return {"type": "testCase", "id": id, "attributes": attributes}
+
+    def instruction(self, id: str, attributes: Dict[str, Any]) -> Dict[str, Any]:
+        return {"type": "testCaseInstruction", "id": id, "attributes": attributes}
+
+    def test_case_run(self, index: int) -> Dict[str, Any]:
+        # Runs are generated on demand, so that large batches do not have to be kept in memory
+        generator = random.Random(index)
+        variations = [
+            {
+                "name": f"Chrome {80 + variation} on Windows",
+                "results": [
+                    {
+                        "outcome": generator.choice(OUTCOMES),
+                        "attachmentUrl": None,
+                        "testerComment": "Works as expected",
+                        "stepsToReproduce": ["Open the page", "Click the button"],
+                        "reportedAt": f"2020-05-{1 + result:02d}T12:{variation:02d}:00Z",
+                        "country": generator.choice(COUNTRIES)[1],
+                    }
+                    for result in range(self.arguments.results)
+                ],
+            }
+            for variation in range(self.arguments.variations)
+        ]
+        attributes = self.attributes(
+            testCaseName=f"Test case {index}",
+            testCaseSection=f"Section {index % 10}",
+            testCaseImportance=IMPORTANCES[index % 3],
+            adaUrl=f"https://app.globalapptesting.com/test_case_runs/{index}",
+            variations=variations,
+        )
+        return {"type": "testCaseRun", "id": f"run-{index}", "attributes": attributes}
+
+    def page(self, path: str, query: Dict[str, str], count: int, item: Callable[[int], Any]) -> Dict[str, Any]:
+        size = int(query.get("page[size]", self.arguments.page_size))
+        number = int(query.get("page[number]", 1))
+        start = (number - 1) * size
+        response = {"data": [item(index) for index in range(start, min(count, start + size))], "links": {}}
+        if start + size < count:
+            next_query = dict(query, **{"page[number]": str(number + 1), "page[size]": str(size)})
+            response["links"]["next"] = f"{path}?{urllib.parse.urlencode(next_query, safe='[],')}"
+        return response
+
+    def route(self, method: str, path: str, query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        match = re.fullmatch(r"/api/v1/(.*)", path)
+        parts = match.group(1).strip("/").split("/") if match else []
+        application = parts[1] if len(parts) > 1 and parts[0] == "applications" else None
+        if application is not None and application not in self.applications:
+            return 404, errors("Not found", f"Application {application} does not exist")
+
+        # Only changes are serialized, pages of test case runs are generated concurrently
+        with self.lock if method != "GET" else contextlib.nullcontext():
+            if parts == ["whoami"]:
+                return 200, {"data": {"type": "organization", "id": "1", "attributes": {"name": "Benchmark"}}}
+            if parts == ["applications"]:
+                return 200, self.page(path, query, len(self.applications), self.application)
+            if parts in [["internet_browsers"], ["mobile_devices"], ["countries"]]:
+                return 200, self.page(path, query, 50, lambda index: self.catalog_item(parts[0], index))
+            if len(parts) >= 3 and parts[2] == "environments":
+                return self.collection(
+                    method, path, query, parts[3:], body, self.environments[application], self.create_environment
+                )
+            if len(parts) >= 3 and parts[2] == "native_application_builds":
+                return self.collection(
+                    method, path, query, parts[3:], body, self.native_builds[application], self.create_native_build
+                )
+            if len(parts) >= 3 and parts[2] == "test_cases":
+                return self.test_cases_route(method, path, query, parts[3:], body, application)
+            if len(parts) >= 3 and parts[2] == "test_case_runs_batches":
+                return self.batches_route(method, path, query, parts[3:], body, application)
+        return 404, errors("Not found")
+
+    def application(self, index: int) -> Dict[str, Any]:
+        attributes = self.attributes(name=f"Application {index}", platformName="web")
+        return {"type": "application", "id": self.applications[index], "attributes": attributes}
+
+    def catalog_item(self, catalog: str, index: int) -> Dict[str, Any]:
+        if catalog == "internet_browsers":
+            attributes = self.attributes(name=f"Browser {index}", operatingSystemName="Windows 10")
+        elif catalog == "mobile_devices":
+            attributes = self.attributes(name=f"Phone {index}", brandName="Brand")
+        else:
+            code, name = COUNTRIES[index % len(COUNTRIES)]
+            attributes = self.attributes(name=name, code=code, availablePlatforms=["web", "android", "ios"])
+        return {"type": catalog, "id": str(index + 1), "attributes": attributes}
+
+    def collection(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, str],
+        rest: List[str],
+        body: bytes,
+        items: List[Dict[str, Any]],
+        create: Callable[[bytes], Dict[str, Any]],
+    ) -> Tuple[int, Any]:
+        if not rest and method == "GET":
+            return 200, self.page(path, query, len(items), lambda index: items[index])
+        if not rest and method == "POST":
+            items.append(create(body))
+            return 201, {"data": items[-1]}
+        matching = [index for index, item in enumerate(items) if rest and item["id"] == rest[0]]
+        if not matching:
+            return 404, errors("Not found")
+        if method == "DELETE":
+            del items[matching[0]]
+            return 204, None
+        if method == "PATCH":
+            attributes = json.loads(body)["data"]["attributes"]
+            items[matching[0]]["attributes"].update(attributes)
+            return 200, {"data": items[matching[0]]}
+        return 405, errors("Method not allowed")
+
+    def create_environment(self, body: bytes) -> Dict[str, Any]:
+        attributes = json.loads(body)["data"]["attributes"]
+        return self.environment(str(next(self.ids)), attributes["name"], attributes["url"])
+
+    def create_native_build(self, body: bytes) -> Dict[str, Any]:
+        # Multipart forms are not fully parsed, only the fields the client sends are picked
+        fields = dict(re.findall(rb'name="([^"]+)"(?:; filename="[^"]*")?\r\n(?:[^\r\n]+\r\n)*\r\n([^\r]*)', body))
+        file_name = re.search(rb'name="data\[attributes\]\[app_file\]"; filename="([^"]*)"', body)
+        return self.native_build(
+            str(next(self.ids)),
+            fields.get(b"data[attributes][name]", b"Build").decode(),
+            file_name.group(1).decode() if file_name else None,
+            fields.get(b"data[attributes][external_vendor_url]", b"").decode() or None,
+        )
+
+    def test_cases_route(
+        self, method: str, path: str, query: Dict[str, str], rest: List[str], body: bytes, application: str
+    ) -> Tuple[int, Any]:
+        test_cases = self.test_cases[application]
+        if not rest and method == "GET":
+            return 200, self.page(path, query, len(test_cases), lambda index: test_cases[index])
+        if not rest and method == "DELETE":
+            ids = set(query.get("ids", "").split(","))
+            test_cases[:] = [test_case for test_case in test_cases if test_case["id"] not in ids]
+            return 204, None
+        if rest == ["delete_all"] and method == "DELETE":
+            test_cases.clear()
+            return 204, None
+        if rest == ["import"] and method == "POST":
+            created = []
+            for data in json.loads(body)["data"]:
+                attributes = data["attributes"]
+                # Embedded test cases are kept as references
+                instructions = [
+                    {"type": "testCase", "id": instruction["id"]}
+                    if instruction["type"] == "testCase"
+                    else self.instruction(str(next(self.ids)), instruction["attributes"])
+                    for instruction in attributes["instructions"]
+                ]
+                created.append(
+                    self.test_case(
+                        str(next(self.ids)),
+                        attributes["title"],
+                        attributes["importance"],
+                        attributes["section"],
+                        instructions,
+                    )
+                )
+            test_cases.extend(created)
+            return 201, {"data": created}
+        return 404, errors("Not found")
+
+    def batches_route(
+        self, method: str, path: str, query: Dict[str, str], rest: List[str], body: bytes, application: str
+    ) -> Tuple[int, Any]:
+        batches = self.batches[application]
+        if not rest and method == "POST":
+            batches.append(str(len(batches) + 1))
+            return 201, {"data": {"type": "testCaseRunsBatch", "id": batches[-1], "attributes": {}}}
+        if not rest or rest[0] not in batches:
+            return 404, errors("Not found")
+        runs = self.arguments.test_case_runs
+        if rest[1:] == ["state"]:
+            attributes = dict(
+                state="completed",
+                totalCount=runs,
+                inProgressCount=0,
+                completedCount=runs,
+                failedCount=runs // 2,
+                passedCount=runs - runs // 2,
+                cancelledCount=0,
+            )
+            return 200, {"data": {"type": "testCaseRunsBatchState", "id": rest[0], "attributes": attributes}}
+        if rest[1:] == ["summary"]:
+            return 200, self.summary(application, rest[0])
+        if rest[1:] == ["test_case_runs"]:
+            indices = range(runs)
+            if query.get("filter[ids]"):
+                requested = set(query["filter[ids]"].split(","))
+                indices = [index for index in indices if f"run-{index}" in requested]
+            return 200, self.page(path, query, len(indices), lambda index: self.filtered_run(indices[index], query))
+        return 404, errors("Not found")
+
+    def filtered_run(self, index: int, query: Dict[str, str]) -> Dict[str, Any]:
+        run = self.test_case_run(index)
+        outcome = query.get("filter[outcome]")
+        if outcome:
+            for variation in run["attributes"]["variations"]:
+                variation["results"] = [result for result in variation["results"] if result["outcome"] == outcome]
+        return run
+
+    def summary(self, application: str, batch: str) -> Dict[str, Any]:
+        runs = [
+            {
+                "type": "testCaseRunsBatchTestCaseRun",
+                "id": f"run-{index}",
+                "attributes": self.attributes(
+                    name=f"Test case {index}",
+                    adaUrl=f"https://app.globalapptesting.com/test_case_runs/{index}",
+                    failedResultsCount=index % 3,
+                    passedResultsCount=3 - index % 3,
+                    totalResultsCount=3,
+                ),
+            }
+            for index in range(self.arguments.test_case_runs)
+        ]
+        return {
+            "data": {
+                "type": "testCaseRunsBatchSummary",
+                "id": batch,
+                "attributes": self.attributes(
+                    name=f"Batch {batch}",
+                    startTime="2020-05-01T12:00:00Z",
+                    finishTime="2020-05-01T14:30:00Z",
+                    testCaseCredits=len(runs),
+                    testersInvolved=12,
+                ),
+                "relationships": {
+                    "application": {"data": {"type": "application", "id": application}},
+                    "environment": {"data": {"type": "applicationEnvironment", "id": "1"}},
+                },
+            },
+            "included": [{"data": runs}],
+        }
+
+
+def errors(title: str, detail: Optional[str] = None) -> Dict[str, Any]:
+    error = {"title": title}
+    if detail:
+        error["detail"] = detail
+    return {"errors": [error]}
+
+
+class FakeGatHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written with a single system call
+    wbufsize = 65536
+    api: FakeGatApi
+
+    def handle_request(self):
+        arguments = self.api.arguments
+        body = self.read_body()
+        if arguments.latency or arguments.jitter:
+            time.sleep(max(0.0, arguments.latency + random.uniform(-arguments.jitter, arguments.jitter)) / 1000)
+
+        if arguments.error_rate and random.random() < arguments.error_rate:
+            self.respond(arguments.error_status, errors("Injected error"), {"Retry-After": "0"})
+            return
+
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        try:
+            status_code, response = self.api.route(self.command, url.path, query, body)
+        except (KeyError, ValueError) as error:
+            status_code, response = 400, errors("Bad request", str(error))
+        self.respond(status_code, response)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = handle_request
+
+    def read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+                if size == 0:
+                    return b"".join(chunks)
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def respond(self, status_code: int, response: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(response, separators=(",", ":")).encode() if response is not None else b""
+        headers = dict(headers or {})
+        if self.command == "GET" and status_code == 200:
+            headers["ETag"] = f'"{hashlib.md5(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == headers["ETag"]:
+                status_code, body = 304, b""
+        self.send_response(status_code)
+        if body:
+            self.send_header("Content-Type", "application/vnd.api+json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any):
+        if self.api.arguments.verbose:
+            super().log_message(format, *args)
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on, 0 picks a free one.")
+    parser.add_argument("--applications", type=int, default=5, help="Number of applications.")
+    parser.add_argument("--environments", type=int, default=3, help="Number of environments per application.")
+    parser.add_argument("--native-builds", type=int, default=3, help="Number of native builds per application.")
+    parser.add_argument("--test-cases", type=int, default=200, help="Number of test cases per application.")
+    parser.add_argument("--batches", type=int, default=3, help="Number of test case runs batches per application.")
+    parser.add_argument("--test-case-runs", type=int, default=10000, help="Number of test case runs per batch.")
+    parser.add_argument("--variations", type=int, default=2, help="Number of variations per test case run.")
+    parser.add_argument("--results", type=int, default=3, help="Number of results per variation.")
+    parser.add_argument("--page-size", type=int, default=100, help="Default number of items per page.")
+    parser.add_argument("--padding", type=int, default=0, help="Size of extra attribute added to each resource.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay of each response in ms.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random variation of the delay in ms.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing.")
+    parser.add_argument("--error-status", type=int, default=503, help="Status code of failing requests.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request.")
+    return parser
+
+
+def serve(arguments: argparse.Namespace) -> http.server.ThreadingHTTPServer:
+    handler = type("Handler", (FakeGatHandler,), {"api": FakeGatApi(arguments)})
+    server = http.server.ThreadingHTTPServer((arguments.host, arguments.port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main() -> int:
+    server = serve(parser().parse_args())
+    host, port = server.server_address[:2]
+    # Benchmarks read the root from the first line of the output
+    print(f"http://{host}:{port}/api/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+# Measures the latency of the first call made by a new client with and without pre-warmed connection. The time spent
+# preparing a command, e.g. parsing its arguments, is simulated by a pause between creating the client and the call:
+#
+#   GAT_API_KEY=... poetry run python benchmarks/prewarm.py --runs 20 --preparation 50
+#
+# Calls with an invalid key fail, but still measure the connection set-up, so the key is optional.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gat  # noqa: E402
+
+
+def first_call_latency(root: str, key: str, prewarm: bool, preparation: float) -> float:
+    configuration = gat.GatApiConfiguration(
+        key=key, root=root, prewarm=prewarm, throttle=False, retry=gat.GatRetryPolicy(max_attempts=1)
+    )
+    api = gat.GatApi(configuration)
+    time.sleep(preparation)
+    start_time = time.perf_counter()
+    try:
+        api.whoami()
+    except gat.GatError:
+        pass
+    return time.perf_counter() - start_time
+
+
+def describe(latencies: List[float]) -> str:
+    latencies = sorted(latency * 1000 for latency in latencies)
+    percentile_90 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))]
+    return f"median {statistics.median(latencies):7.1f} ms, p90 {percentile_90:7.1f} ms, max {latencies[-1]:7.1f} ms"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", default="https://app.globalapptesting.com/api/", help="API root URL.")
+    parser.add_argument("--key", default=os.environ.get("GAT_API_KEY") or "benchmark", help="API key.")
+    parser.add_argument("--runs", type=int, default=10, help="Number of clients created in each mode.")
+    parser.add_argument("--preparation", type=float, default=50.0, help="Pause before the first call in ms.")
+    arguments = parser.parse_args()
+
+    # Import requests up front, only the connection set-up is compared
+    gat.GatApiConfiguration(key=arguments.key).session
+    results = {False: [], True: []}
+    # Alternate the modes, so that both are equally affected by changing network conditions
+    for _ in range(arguments.runs):
+        for prewarm in results:
+            results[prewarm].append(
+                first_call_latency(arguments.root, arguments.key, prewarm, arguments.preparation / 1000)
+            )
+
+    print(f"{'cold connection':20} {describe(results[False])}")
+    print(f"{'pre-warmed':20} {describe(results[True])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+# Measures the start-up time of gat-cli.py for commands that never reach the API, on top of the start-up time of the
+# interpreter itself, and fails when it exceeds the budget or when a module which should only be imported on demand is
+# imported, e.g.
+#
+#   poetry run python benchmarks/startup.py --runs 20 --budget 120
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gat-cli.py")
+
+SCENARIOS = [["--help"], ["whoami", "--help"], ["-k", "benchmark", "list-environments"]]
+
+DEFERRED_MODULES = ["requests", "urllib3", "tabulate", "asyncio", "aiohttp", "concurrent.futures"]
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(arguments: List[str]) -> Tuple[float, Dict[str, int]]:
+    started_at = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *arguments],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        env={**os.environ, "GAT_API_KEY": ""},
+    )
+    elapsed = time.perf_counter() - started_at
+    cumulative = {}
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return elapsed, cumulative
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10, help="Number of runs of each scenario.")
+    parser.add_argument(
+        "--budget", type=float, default=150.0, help="Maximum median start-up time over the interpreter in ms."
+    )
+    arguments = parser.parse_args()
+
+    interpreter_time = statistics.median(import_times(["-c", "pass"])[0] for _ in range(arguments.runs)) * 1000
+    print(f"{'interpreter':40} median {interpreter_time:7.1f} ms")
+
+    failed = False
+    for scenario in SCENARIOS:
+        runs = [import_times([CLI, *scenario]) for _ in range(arguments.runs)]
+        wall_time = statistics.median(elapsed for elapsed, _ in runs) * 1000 - interpreter_time
+        cumulative = runs[-1][1]
+        gat_time = cumulative.get("gat", 0) / 1000
+        imported = [module for module in DEFERRED_MODULES if module in cumulative]
+        print(
+            f"{' '.join(scenario):40} median {wall_time:+7.1f} ms, gat imported in {gat_time:6.1f} ms, "
+            f"{len(cumulative)} modules"
+        )
+        if wall_time > arguments.budget:
+            print(f"  over budget of {arguments.budget:.1f} ms")
+            failed = True
+        if imported:
+            print(f"  imported deferred modules: {', '.join(imported)}")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+# Runs the main calls of gat.GatApi and commands of gat-cli.py against the local fake server (fake_server.py) and
+# reports calls per second, latency percentiles and peak memory, e.g.
+#
+#   poetry run python benchmarks/throughput.py --test-case-runs 20000 --latency 5
+#
+# Arguments not known to this script are passed to the fake server. The rate controller is disabled, so that the
+# client itself is measured, unless --throttle is given.
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIRECTORY)
+
+import gat  # noqa: E402
+import tabulate  # noqa: E402
+
+# Runs gat-cli.py and reports its peak resident set size; unlike the resource usage of a child process, VmHWM (Linux
+# only) does not include memory of the benchmark inherited by the child before it started the CLI
+MEASURE_CLI = """
+import atexit, runpy, sys
+def report():
+    with open("/proc/self/status") as status:
+        print(status.read().split("VmHWM:")[1].split()[0], file=sys.stderr)
+atexit.register(report)
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+HEADERS = ["Scenario", "Calls", "Items", "Seconds", "Calls/sec", "Items/sec", "p50 ms", "p95 ms", "p99 ms", "Peak MiB"]
+
+
+def start_server(server_arguments: List[str]) -> Tuple[subprocess.Popen, str]:
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT_DIRECTORY, "benchmarks", "fake_server.py"), "--port", "0"]
+        + server_arguments,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    return server, server.stdout.readline().strip()
+
+
+def library_scenario(name: str, root: str, throttle: bool, run: Callable[[gat.GatApi], int]) -> List[Any]:
+    metrics = gat.GatMetrics()
+    configuration = gat.GatApiConfiguration(key="benchmark", root=root, metrics=metrics, throttle=throttle)
+    api = gat.GatApi(configuration)
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    items = run(api)
+    elapsed_time = time.perf_counter() - start_time
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    summary = metrics.summary()
+    # Percentiles are reported for the endpoint called most often
+    busiest = max(summary, key=lambda stats: stats.count)
+    calls = sum(stats.count for stats in summary)
+    return [
+        name,
+        calls,
+        items,
+        elapsed_time,
+        calls / elapsed_time,
+        items / elapsed_time,
+        busiest.p50 * 1000,
+        busiest.p95 * 1000,
+        busiest.p99 * 1000,
+        peak_memory / 2 ** 20,
+    ]
+
+
+def cli_scenario(name: str, root: str, arguments: List[str], runs: int) -> List[Any]:
+    latencies = []
+    peak_memory = 0
+    items = 0
+    environment = dict(os.environ, GAT_API_KEY="benchmark", GAT_API_ROOT=root)
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-c", MEASURE_CLI, os.path.join(ROOT_DIRECTORY, "gat-cli.py"), "--no-cache", *arguments],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=ROOT_DIRECTORY,
+            env=environment,
+        )
+        latencies.append(time.perf_counter() - start_time)
+        if process.returncode:
+            raise RuntimeError(f"{name} failed: {process.stderr.decode()}")
+        items = process.stdout.count(b"\n")
+        peak_memory = max(peak_memory, int(process.stderr.splitlines()[-1]) * 1024)
+
+    latencies.sort()
+    elapsed_time = sum(latencies)
+    return [
+        name,
+        runs,
+        items * runs,
+        elapsed_time,
+        runs / elapsed_time,
+        items * runs / elapsed_time,
+        gat.metrics.percentile(latencies, 0.50) * 1000,
+        gat.metrics.percentile(latencies, 0.95) * 1000,
+        gat.metrics.percentile(latencies, 0.99) * 1000,
+        peak_memory / 2 ** 20,
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500, help="Number of calls in single call scenarios.")
+    parser.add_argument("--workers", type=int, default=10, help="Number of threads in concurrent scenarios.")
+    parser.add_argument("--cli-runs", type=int, default=5, help="Number of runs of each command.")
+    parser.add_argument("--test-case-runs", type=int, default=10000, help="Number of test case runs per batch.")
+    parser.add_argument("--throttle", action="store_true", help="Keep the default rate controller.")
+    arguments, server_arguments = parser.parse_known_args()
+
+    server, root = start_server(["--test-case-runs", str(arguments.test_case_runs), *server_arguments])
+    try:
+        scenarios: Dict[str, Callable[[gat.GatApi], int]] = {
+            "whoami": lambda api: sum(1 for _ in range(arguments.calls) if api.whoami()),
+            "batch state, concurrent": lambda api: len(
+                api.map(
+                    lambda index: api.test_case_runs_batch_state(api.application_reference("1"), str(index % 3 + 1)),
+                    range(arguments.calls),
+                    max_workers=arguments.workers,
+                )
+            ),
+            "list test cases": lambda api: len(api.test_cases(api.application_reference("1"))),
+            "test case runs": lambda api: sum(
+                1 for _ in api.iter_test_case_runs(api.application_reference("1"), "1", None, None, None)
+            ),
+            "test case runs, prefetch": lambda api: sum(
+                1 for _ in api.iter_test_case_runs(api.application_reference("1"), "1", None, None, None, True)
+            ),
+            "test case runs, stream": lambda api: sum(
+                1 for _ in api.iter_test_case_runs(api.application_reference("1"), "1", None, None, None, stream=True)
+            ),
+            "batch summary": lambda api: len(
+                api.test_case_runs_batch_summary(api.application_reference("1"), "1").test_case_runs
+            ),
+        }
+        table = [HEADERS]
+        for name, run in scenarios.items():
+            table.append(library_scenario(name, root, arguments.throttle, run))
+
+        commands = {
+            "cli whoami": ["whoami"],
+            "cli list-test-cases": ["list-test-cases", "-a", "1"],
+            "cli list-test-case-runs": ["list-test-case-runs", "-a", "1", "-b", "1"],
+            "cli list-test-case-runs, ndjson": ["-f", "ndjson", "list-test-case-runs", "-a", "1", "-b", "1"],
+        }
+        for name, command in commands.items():
+            table.append(cli_scenario(name, root, command, arguments.cli_runs))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(tabulate.tabulate(table, headers="firstrow", floatfmt=".1f"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
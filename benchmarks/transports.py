@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+# Runs the same gat.GatApi calls over each HTTP transport and compares throughput, latency and client CPU time per
+# call, against the local fake server (fake_server.py) unless --root is given, e.g.
+#
+#   poetry run python benchmarks/transports.py --calls 2000 --workers 16
+#
+# The httpx transports are skipped unless the "http2" extra is installed. The fake server only speaks HTTP/1.1, so
+# there the HTTP/2 transport measures the overhead of httpx rather than the gain of multiplexing.
+
+import argparse
+import functools
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIRECTORY)
+
+import gat  # noqa: E402
+import tabulate  # noqa: E402
+
+HEADERS = ["Transport", "Scenario", "Calls", "Calls/sec", "p50 ms", "p99 ms", "CPU ms/call"]
+
+
+def transport_factories() -> Dict[str, Callable[[gat.GatApiConfiguration], gat.GatTransport]]:
+    factories = {"requests": gat.GatRequestsTransport, "urllib3": gat.GatUrllib3Transport}
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        return factories
+    factories["httpx"] = functools.partial(gat.GatHttpxTransport, http2=False)
+    factories["httpx, http2"] = functools.partial(gat.GatHttpxTransport, http2=True)
+    return factories
+
+
+def timed(call: Callable[[], Any]) -> float:
+    start_time = time.perf_counter()
+    call()
+    return time.perf_counter() - start_time
+
+
+def run_scenario(name: str, api: gat.GatApi, run: Callable[[gat.GatApi], List[float]]) -> List[Any]:
+    start_time, start_cpu_time = time.perf_counter(), time.process_time()
+    latencies = run(api)
+    elapsed_time, cpu_time = time.perf_counter() - start_time, time.process_time() - start_cpu_time
+    calls = len(latencies)
+    return [
+        name,
+        calls,
+        calls / elapsed_time,
+        gat.metrics.percentile(latencies, 0.50) * 1000,
+        gat.metrics.percentile(latencies, 0.99) * 1000,
+        cpu_time / calls * 1000,
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", help="API root URL, the fake server is started when not given.")
+    parser.add_argument("--key", default=os.environ.get("GAT_API_KEY") or "benchmark", help="API key.")
+    parser.add_argument("--application", default="1", help="Application ID used by the calls.")
+    parser.add_argument("--calls", type=int, default=1000, help="Number of calls in each scenario.")
+    parser.add_argument("--workers", type=int, default=10, help="Number of threads in the concurrent scenario.")
+    arguments, server_arguments = parser.parse_known_args()
+
+    server = None
+    root = arguments.root
+    if root is None:
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT_DIRECTORY, "benchmarks", "fake_server.py"), "--port", "0"]
+            + server_arguments,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        root = server.stdout.readline().strip()
+
+    calls, workers = arguments.calls, arguments.workers
+    scenarios: Dict[str, Callable[[gat.GatApi], List[float]]] = {
+        "sequential, small": lambda api: [timed(api.whoami) for _ in range(calls)],
+        "sequential, large": lambda api: [
+            timed(lambda: api.test_cases(api.application_reference(arguments.application)))
+            for _ in range(max(1, calls // 10))
+        ],
+        "concurrent, small": lambda api: api.map(lambda _: timed(api.whoami), range(calls), max_workers=workers),
+    }
+    table = [HEADERS]
+    try:
+        for transport, factory in transport_factories().items():
+            # Only the transport differs; caching, coalescing and throttling would hide its cost
+            configuration = gat.GatApiConfiguration(
+                key=arguments.key,
+                root=root,
+                http_cache=None,
+                coalescer=None,
+                throttle=False,
+                pool_maxsize=workers,
+                transport_factory=factory,
+            )
+            api = gat.GatApi(configuration)
+            # The first call imports the transport and opens a connection, which is not part of the per-call cost
+            api.whoami()
+            for name, run in scenarios.items():
+                table.append([transport] + run_scenario(name, api, run))
+            configuration.transport.close()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(tabulate.tabulate(table, headers="firstrow", floatfmt=".2f"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
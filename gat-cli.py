@@ -1,15 +1,57 @@
 #!/usr/bin/env python3
 
+import contextlib
+import csv
+import datetime
+import functools
+import itertools
+import json
 import logging
 import os
-from typing import List, Optional, Tuple
+import re
+import shlex
+import threading
+from typing import Any, IO, Iterable, Iterator, List, Optional, Tuple
 
 import click
-import tabulate
 
 import gat
 
 
+class Duration(click.ParamType):
+    name = "duration"
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+    def convert(self, value: Any, param: Optional[click.Parameter], context: Optional[click.Context]) -> float:
+        if isinstance(value, (int, float)):
+            return float(value)
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*", value)
+        if not match:
+            self.fail(f"{value} is not a valid duration, use e.g. 30s, 1.5m or 500ms", param, context)
+        return float(match.group(1)) * self.units[match.group(2) or "s"]
+
+
+class ByteSize(click.ParamType):
+    name = "size"
+    units = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+    def convert(self, value: Any, param: Optional[click.Parameter], context: Optional[click.Context]) -> float:
+        if isinstance(value, (int, float)):
+            return float(value)
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmg]?)b?\s*", value.lower())
+        if not match:
+            self.fail(f"{value} is not a valid size, use e.g. 500K, 10M or 1.5G", param, context)
+        return float(match.group(1)) * self.units[match.group(2)]
+
+
+TRANSPORTS = {
+    "requests": gat.GatRequestsTransport,
+    "urllib3": gat.GatUrllib3Transport,
+    "httpx": functools.partial(gat.GatHttpxTransport, http2=False),
+    "http2": functools.partial(gat.GatHttpxTransport, http2=True),
+}
+
+
 @click.group(context_settings={"help_option_names": ["-h", "--help"]})
 @click.option("-v", "--verbose", count=True, help="Enable informational logging, use second time for debugging logs.")
 @click.option(
@@ -19,8 +61,75 @@ import gat
     default=lambda: os.environ.get("GAT_API_KEY", None),
     required=True,
 )
+@click.option(
+    "--root",
+    help="API root URL (can be also set in GAT_API_ROOT environment variable)",
+    default=lambda: os.environ.get("GAT_API_ROOT", gat.GatApiConfiguration.root),
+)
+@click.option(
+    "--transport",
+    default="requests",
+    type=click.Choice(["requests", "urllib3", "httpx", "http2"]),
+    help="HTTP client used for API calls, httpx and http2 need the http2 extra.",
+)
+@click.option("--no-cache", "no_cache", is_flag=True, help="Do not use the on-disk cache of API responses.")
+@click.option("--refresh", is_flag=True, help="Ignore cached catalog responses and fetch them again.")
+@click.option(
+    "--prewarm", is_flag=True, help="Connect to the API in the background while the command is being prepared."
+)
+@click.option(
+    "--throttle/--no-throttle",
+    default=True,
+    help="Adapt the number of concurrent calls and the call rate to the API's responses (on by default).",
+)
+@click.option(
+    "--deadline", type=Duration(), default=None, help="Time limit for all API calls of the command, e.g. 30s or 2m."
+)
+@click.option("--profile", is_flag=True, help="Print timings of API calls to standard error.")
+@click.option(
+    "--profile-trace",
+    "profile_trace",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write timings of API calls to the given file in Chrome trace format.",
+)
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Record API responses to the given cassette file (gzipped NDJSON).",
+)
+@click.option(
+    "--replay",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Replay API responses from the given cassette file instead of calling the API.",
+)
+@click.option("--replay-latency", "replay_latency", is_flag=True, help="Wait for recorded response times in replay.")
+@click.option(
+    "-f",
+    "--format",
+    "output_format",
+    default="table",
+    type=click.Choice(["table", "ndjson", "csv", "json"]),
+    help="Output format, all but table are written as rows are received.",
+)
 @click.pass_context
-def cli(context: click.Context, verbose: int, key: str) -> None:
+def cli(
+    context: click.Context,
+    verbose: int,
+    key: str,
+    root: str,
+    transport: str,
+    no_cache: bool,
+    refresh: bool,
+    prewarm: bool,
+    throttle: bool,
+    deadline: Optional[float],
+    profile: bool,
+    profile_trace: Optional[str],
+    record: Optional[str],
+    replay: Optional[str],
+    replay_latency: bool,
+    output_format: str,
+) -> None:
     """
     Global App Testing command line client.
     """
@@ -31,7 +140,48 @@ def cli(context: click.Context, verbose: int, key: str) -> None:
     else:
         logging.basicConfig(level=logging.WARNING)
 
-    context.obj = gat.GatApi(gat.GatApiConfiguration(key=key))
+    if record and replay:
+        raise click.UsageError("--record and --replay cannot be used together")
+
+    context.meta["gat.output_format"] = output_format
+    cache = None if no_cache else gat.GatCache(refresh=refresh)
+    # Responses with validators are kept on disk as well, so that repeated commands only download changed ones
+    http_cache = gat.GatHttpCache(disk=gat.GatCache(directory=os.path.join(cache.directory, "http")) if cache else None)
+    metrics = gat.GatMetrics() if profile or profile_trace else None
+    # Kept even with --no-cache, it only remembers which files have been uploaded; it has its own directory, so that
+    # evicting or clearing cached responses does not remove it
+    upload_index = gat.GatUploadIndex(
+        os.path.join(cache.directory if cache else gat.cache.default_cache_directory(), "uploads", "native-builds.json")
+    )
+    cassette = None
+    if record or replay:
+        cassette = gat.GatCassette(record or replay, "record" if record else "replay", replay_latency)
+        context.call_on_close(cassette.close)
+        # Every call has to reach the cassette, so that the replay does not depend on the cache of the recording
+        cache = http_cache = upload_index = None
+    configuration = gat.GatApiConfiguration(
+        key=key,
+        root=root,
+        cache=cache,
+        http_cache=http_cache,
+        metrics=metrics,
+        prewarm=prewarm,
+        cassette=cassette,
+        upload_index=upload_index,
+        transport_factory=TRANSPORTS[transport],
+        # Replayed calls do not load the API
+        throttle=throttle and not replay,
+    )
+    context.obj = gat.GatApi(configuration)
+    if metrics:
+        context.call_on_close(lambda: echo_profile(metrics, profile_trace, configuration.rate_controller))
+
+    # In batch mode the deadline applies to each command separately
+    context.meta["gat.deadline"] = deadline
+    if deadline is not None and context.invoked_subcommand != "batch":
+        deadline_context = context.obj.deadline(deadline)
+        deadline_context.__enter__()
+        context.call_on_close(lambda: deadline_context.__exit__(None, None, None))
 
 
 @cli.command()
@@ -43,7 +193,7 @@ def whoami(context: click.Context) -> None:
     api = context.obj
     organization = api.whoami()
     table = [["ID", "Name"], [organization.id, organization.name]]
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
 
 
 @cli.command()
@@ -53,9 +203,11 @@ def list_applications(context: click.Context) -> None:
     Show a list of applications.
     """
     api = context.obj
-    table = [["ID", "Name", "Platform"]]
-    table.extend([[application.id, application.name, application.platform_name] for application in api.applications()])
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    table = itertools.chain(
+        [["ID", "Name", "Platform"]],
+        ([application.id, application.name, application.platform_name] for application in api.iter_applications()),
+    )
+    echo_table(context, table)
 
 
 @cli.command()
@@ -66,10 +218,12 @@ def list_environments(context: click.Context, application_id: str) -> None:
     Show a list of environments for the given application.
     """
     api = context.obj
-    table = [["ID", "Name", "URL"]]
-    application = api.application_by_id(application_id)
-    table.extend([[environment.id, environment.name, environment.url] for environment in api.environments(application)])
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    application = api.application_reference(application_id)
+    table = itertools.chain(
+        [["ID", "Name", "URL"]],
+        ([environment.id, environment.name, environment.url] for environment in api.iter_environments(application)),
+    )
+    echo_table(context, table)
 
 
 @cli.command()
@@ -82,10 +236,10 @@ def create_environment(context: click.Context, application_id: str, name: str, u
     Create a new environment for the given application.
     """
     api = context.obj
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
     environment = api.create_environment(application, name, url)
     table = [["ID", "Name", "URL"], [environment.id, environment.name, environment.url]]
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
 
 
 @cli.command()
@@ -97,7 +251,7 @@ def delete_environment(context: click.Context, application_id: str, environment_
     Delete given environment from the given application.
     """
     api = context.obj
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
     environment = api.environment_by_id(application, environment_id)
     api.delete_environment(application, environment)
     click.echo(f"Environment {environment.name} deleted for application {application.name}")
@@ -114,11 +268,11 @@ def update_environment(context: click.Context, application_id: str, environment_
     Update given environment with new name and URL.
     """
     api = context.obj
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
     environment = api.environment_by_id(application, environment_id)
     updated_environment = api.update_environment(application, environment, name, url)
     table = [["ID", "Name", "URL"], [updated_environment.id, updated_environment.name, updated_environment.url]]
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
 
 
 @cli.command()
@@ -129,29 +283,31 @@ def list_native_builds(context: click.Context, application_id: str) -> None:
     Show a list of native builds for the given application.
     """
     api = context.obj
-    table = [["ID", "Name", "Original file name", "External vendor URL", "Signing status"]]
-    application = api.application_by_id(application_id)
-    table.extend(
-        [
+    application = api.application_reference(application_id)
+    table = itertools.chain(
+        [["ID", "Name", "Original file name", "External vendor URL", "Signing status"]],
+        (
             [build.id, build.name, build.original_file_name, build.external_vendor_url, build.signing_status]
-            for build in api.native_builds(application)
-        ]
+            for build in api.iter_native_builds(application)
+        ),
     )
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
 
 
 @cli.command()
 @click.option("-a", "--application", "application_id", required=True, help="Application ID.")
+@click.option("--no-dedupe", is_flag=True, help="Upload the file even if it has been uploaded before.")
 @click.argument("name")
 @click.argument("build")
 @click.pass_context
-def create_native_build(context: click.Context, application_id: str, name: str, build: str) -> None:
+def create_native_build(context: click.Context, application_id: str, no_dedupe: bool, name: str, build: str) -> None:
     """
-    Create a new native build for the given application.
+    Create a new native build for the given application. A file that has already been uploaded from this machine is
+    not sent again, the existing build is shown instead, under the name it was created with.
     """
     api = context.obj
-    application = api.application_by_id(application_id)
-    new_build = api.create_native_build(application, name, build)
+    application = api.application_reference(application_id)
+    new_build = api.create_native_build(application, name, build, dedupe=not no_dedupe)
 
     table = [
         ["ID", "Name", "Original file name", "External vendor URL", "Signing status"],
@@ -164,7 +320,88 @@ def create_native_build(context: click.Context, application_id: str, name: str,
         ],
     ]
 
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
+
+
+@cli.command()
+@click.option("-a", "--application", "application_id", required=True, help="Application ID.")
+@click.option("-j", "--jobs", type=click.IntRange(min=1), default=4, help="Number of files uploaded at the same time.")
+@click.option("--limit-rate", type=ByteSize(), help="Upload speed limit of all files together per second, e.g. 10M.")
+@click.option("--no-dedupe", is_flag=True, help="Upload files even if they have been uploaded before.")
+@click.argument("builds", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.pass_context
+def create_native_builds(
+    context: click.Context,
+    application_id: str,
+    jobs: int,
+    limit_rate: Optional[float],
+    no_dedupe: bool,
+    builds: Tuple[str, ...],
+) -> None:
+    """
+    Upload many native build files for the given application at the same time, each named after its file name
+    without extension.
+    """
+    api = context.obj
+    application = api.application_reference(application_id)
+    bandwidth_limiter = gat.GatBandwidthLimiter(limit_rate) if limit_rate else None
+    sent = dict.fromkeys(builds, 0)
+    sizes = {}
+    for build in builds:
+        try:
+            sizes[build] = os.path.getsize(build)
+        except OSError:
+            # Reported with the result of its upload
+            sizes[build] = 0
+    lock = threading.Lock()
+
+    with click.progressbar(
+        length=sum(sizes.values()), label="Uploading", file=click.get_text_stream("stderr")
+    ) as progress_bar:
+
+        def upload(build: str) -> Tuple[str, Optional[gat.NativeBuild], Optional[str]]:
+            size = sizes[build]
+
+            def progress(position: int, total: int):
+                # Positions in the body, form fields around the file included, are scaled to the file size; a retry
+                # starts again from the beginning, so only the furthest position reached is counted
+                done = position * size // total if total else size
+                with lock:
+                    if done > sent[build]:
+                        progress_bar.update(done - sent[build])
+                        sent[build] = done
+
+            name = os.path.splitext(os.path.basename(build))[0]
+            try:
+                new_build = api.create_native_build(
+                    application, name, build, progress, bandwidth_limiter, dedupe=not no_dedupe
+                )
+                # Files uploaded before are not sent, they still count as done
+                with lock:
+                    progress_bar.update(max(0, size - sent[build]))
+                return build, new_build, None
+            except (gat.GatError, OSError) as error:
+                # Failures of a file, e.g. one that cannot be read, do not stop the other uploads
+                return build, None, str(error)
+
+        results = api.map(upload, builds, max_workers=jobs)
+
+    echo_table(
+        context,
+        itertools.chain(
+            [["File", "ID", "Name", "Original file name", "Signing status"]],
+            (
+                [build, new_build.id, new_build.name, new_build.original_file_name, new_build.signing_status]
+                for build, new_build, _ in results
+                if new_build is not None
+            ),
+        ),
+    )
+    failures = [(build, error) for build, _, error in results if error is not None]
+    for build, error in failures:
+        click.echo(f"{build}: {error}", err=True)
+    if failures:
+        raise click.ClickException(f"{len(failures)} upload(s) failed")
 
 
 @cli.command()
@@ -178,7 +415,7 @@ def delete_native_build(context: click.Context, application_id: str, native_buil
     Delete native build
     """
     api = context.obj
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
     native_build = api.native_build_by_id(application, native_build_id)
 
     api.delete_native_build(application, native_build_id)
@@ -199,7 +436,7 @@ def update_native_build(context: click.Context, application_id: str, id: str, na
     Update given build with new name
     """
     api = context.obj
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
     native_build = api.native_build_by_id(application, id)
     updated_build = api.update_native_build(application, native_build, name)
 
@@ -216,7 +453,7 @@ def update_native_build(context: click.Context, application_id: str, id: str, na
         ]
     )
 
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
 
 
 @cli.command()
@@ -226,9 +463,11 @@ def list_internet_browsers(context: click.Context) -> None:
     List known Internet browsers.
     """
     api = context.obj
-    table = [["ID", "Name", "Operating system"]]
-    table.extend([[browser.id, browser.name, browser.operating_system_name] for browser in api.internet_browsers()])
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    table = itertools.chain(
+        [["ID", "Name", "Operating system"]],
+        ([browser.id, browser.name, browser.operating_system_name] for browser in api.iter_internet_browsers()),
+    )
+    echo_table(context, table)
 
 
 @cli.command()
@@ -238,9 +477,10 @@ def list_mobile_devices(context: click.Context) -> None:
     List known mobile devices.
     """
     api = context.obj
-    table = [["ID", "Brand", "Name"]]
-    table.extend([[device.id, device.brand_name, device.name] for device in api.mobile_devices()])
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    table = itertools.chain(
+        [["ID", "Brand", "Name"]], ([device.id, device.brand_name, device.name] for device in api.iter_mobile_devices())
+    )
+    echo_table(context, table)
 
 
 @cli.command()
@@ -252,7 +492,7 @@ def get_test_case_runs_batch_state(context: click.Context, application_id: str,
     Show a state of a test case runs batch.
     """
     api = context.obj
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
     state = api.test_case_runs_batch_state(application, test_case_runs_batch_id)
     table = [
         ["ID", "State", "Total", "In progress", "Completed", "Failed", "Passed", "Cancelled"],
@@ -267,7 +507,7 @@ def get_test_case_runs_batch_state(context: click.Context, application_id: str,
             state.cancelled_count,
         ],
     ]
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
 
 
 @cli.command()
@@ -279,9 +519,9 @@ def get_test_case_runs_batch_summary(context: click.Context, application_id: str
     Show a summary of a test case runs batch.
     """
     api = context.obj
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
     summary = api.test_case_runs_batch_summary(application, test_case_runs_batch_id)
-    table = [
+    summary_table = [
         ["ID", "Name", "Started", "Finished", "Credits", "Testers involved"],
         [
             summary.id,
@@ -292,12 +532,9 @@ def get_test_case_runs_batch_summary(context: click.Context, application_id: str
             summary.testers_involved,
         ],
     ]
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
-    click.echo("\nTest case runs:")
-
-    table = [["ID", "Name", "Ada URL", "Failed results", "Passed results", "Total results"]]
+    test_case_runs_table = [["ID", "Name", "Ada URL", "Failed results", "Passed results", "Total results"]]
     for test_case_run in summary.test_case_runs:
-        table.append(
+        test_case_runs_table.append(
             [
                 test_case_run.id,
                 test_case_run.name,
@@ -307,7 +544,22 @@ def get_test_case_runs_batch_summary(context: click.Context, application_id: str
                 test_case_run.total_results_count,
             ]
         )
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+
+    if context.meta["gat.output_format"] == "table":
+        echo_table(context, summary_table)
+        click.echo("\nTest case runs:")
+        echo_table(context, test_case_runs_table)
+        return
+
+    # Other formats are a single list of records, one per test case run, each repeating the summary
+    summary_headers, summary_row = summary_table
+    echo_table(
+        context,
+        itertools.chain(
+            [summary_headers + [f"Test case run {header}" for header in test_case_runs_table[0]]],
+            (summary_row + row for row in test_case_runs_table[1:] or [[None] * len(test_case_runs_table[0])]),
+        ),
+    )
 
 
 @cli.command()
@@ -342,7 +594,7 @@ def create_test_case_runs_batch(
     """
     api = context.obj
 
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
     environment = api.environment_by_id(application, environment_id)
     internet_browser = [ib for ib in api.internet_browsers() if ib.id in internet_browser_ids]
     if len(internet_browser_ids) != len(internet_browser):
@@ -355,7 +607,7 @@ def create_test_case_runs_batch(
 
     test_case_runs_batch = api.create_test_case_runs_batch(application, environment, internet_browser, test_cases)
     table = [["ID"], [test_case_runs_batch.id]]
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
 
 
 @cli.command()
@@ -366,15 +618,15 @@ def list_test_cases(context: click.Context, application_id: str) -> None:
     List test cases for given application.
     """
     api = context.obj
-    application = api.application_by_id(application_id)
-    table = [["ID", "Title", "Importance", "Section"]]
-    table.extend(
-        [
+    application = api.application_reference(application_id)
+    table = itertools.chain(
+        [["ID", "Title", "Importance", "Section"]],
+        (
             [test_case.id, test_case.title, test_case.importance, test_case.section]
-            for test_case in api.test_cases(application)
-        ]
+            for test_case in api.iter_test_cases(application)
+        ),
     )
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
 
 
 @cli.command()
@@ -385,7 +637,7 @@ def delete_test_cases(context: click.Context, application_id: str) -> None:
     Delete ALL test cases for given application.
     """
     api = context.obj
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
     api.delete_all_test_cases(application)
     click.echo(f"All test cases deleted for application {application.name}")
 
@@ -393,23 +645,37 @@ def delete_test_cases(context: click.Context, application_id: str) -> None:
 @cli.command()
 @click.option("-a", "--application", "application_id", required=True, help="Application ID.")
 @click.option(
-    "-t",
-    "--test-case",
-    "test_case_ids",
-    required=True,
-    multiple=True,
-    help="Test case ID to delete (can be used multiple times).",
+    "-t", "--test-case", "test_case_ids", multiple=True, help="Test case ID to delete (can be used multiple times).",
+)
+@click.option(
+    "--from-file",
+    type=click.File("r"),
+    help="File with test case IDs to delete, separated by whitespace or commas, '-' for standard input.",
 )
+@click.option("-j", "--jobs", type=click.IntRange(min=1), default=4, help="Number of requests sent at the same time.")
 @click.pass_context
-def delete_test_cases_by_id(context: click.Context, application_id: str, test_case_ids: List[str]) -> None:
+def delete_test_cases_by_id(
+    context: click.Context, application_id: str, test_case_ids: Tuple[str, ...], from_file: Optional[IO[str]], jobs: int
+) -> None:
     """
-    Delete given test cases from the given application
+    Delete given test cases from the given application. Many IDs are split over several requests.
     """
+    ids = list(test_case_ids) + (re.split(r"[\s,]+", from_file.read().strip()) if from_file else [])
+    ids = [id for id in ids if id]
+    if not ids:
+        raise click.UsageError("No test case IDs given, use --test-case or --from-file")
     api = context.obj
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
 
-    api.delete_test_cases(application, test_case_ids)
-    click.echo(f"Test cases with given ids were deleted: {' '.join(test_case_ids)}")
+    try:
+        api.delete_test_cases(application, ids, jobs)
+    except gat.GatBulkError as error:
+        failed_ids = set(error.failed_ids)
+        deleted_ids = [id for id in ids if id not in failed_ids]
+        if deleted_ids:
+            click.echo(f"Test cases with given ids were deleted: {' '.join(deleted_ids)}")
+        raise click.ClickException(f"{error}\nTest cases with these ids were not deleted: {' '.join(error.failed_ids)}")
+    click.echo(f"Test cases with given ids were deleted: {' '.join(ids)}")
 
 
 @cli.command()
@@ -442,14 +708,9 @@ def create_test_case(
     Each instruction with following pattern: "embedded_id={test_case_id}" will create an embedded relation.
     """
     api = context.obj
-    application = api.application_by_id(application_id)
+    application = api.application_reference(application_id)
 
-    instructions = [
-        gat.EmbeddedTestCase(id=instruction_text.replace("embedded_id=", ""))
-        if instruction_text.startswith("embedded_id=")
-        else gat.TestCaseInstruction(id="new", content=instruction_text, assertion=instruction_text.endswith("?"))
-        for instruction_text in instruction
-    ]
+    instructions = [gat.importer.instruction_from_text(instruction_text) for instruction_text in instruction]
     test_case = gat.TestCase(id="new", title=title, importance=importance, section=section, instructions=instructions)
 
     created_test_case = api.create_test_cases(application, [test_case])[0]
@@ -457,7 +718,150 @@ def create_test_case(
         ["ID", "Title", "Importance", "Section"],
         [created_test_case.id, created_test_case.title, created_test_case.importance, created_test_case.section],
     ]
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
+
+
+@cli.command()
+@click.option("-a", "--application", "application_id", required=True, help="Application ID.")
+@click.option(
+    "--input-format",
+    "data_format",
+    type=click.Choice(sorted(set(gat.importer.FORMATS.values()))),
+    help="Format of the file, by default guessed from its extension.",
+)
+@click.option("--chunk-size", type=click.IntRange(min=1), default=100, help="Maximum number of test cases per request.")
+@click.option("--chunk-bytes", type=ByteSize(), default="1M", help="Maximum size of a request, e.g. 512K.")
+@click.option("-j", "--jobs", type=click.IntRange(min=1), default=4, help="Number of requests sent at the same time.")
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False),
+    help="File recording the chunks created, an import run again with it only sends the remaining ones.",
+)
+@click.argument("source", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.pass_context
+def import_test_cases(
+    context: click.Context,
+    application_id: str,
+    data_format: Optional[str],
+    chunk_size: int,
+    chunk_bytes: float,
+    jobs: int,
+    checkpoint: Optional[str],
+    source: str,
+) -> None:
+    """
+    Create test cases defined in a JSON, NDJSON, CSV or YAML file, or standard input when SOURCE is '-'.
+
+    Each test case has a title, and optionally an importance (Low, Medium or Critical, Medium by default), a section
+    and a list of instructions, which follow the rules of create-test-case; JSON instructions can also be objects with
+    content and assertion, or embedded_id. In CSV files instructions are written one per line in a single cell.
+
+    Test cases are sent in chunks, several at once. When some chunks fail, run the import again with the same
+    --checkpoint to send only those.
+    """
+    data_format = guess_format(source, data_format)
+    if checkpoint and source == "-":
+        raise click.UsageError("--checkpoint cannot be used with standard input")
+
+    api = context.obj
+    application = api.application_reference(application_id)
+    max_bytes = int(chunk_bytes)
+    import_checkpoint = (
+        gat.GatImportCheckpoint(checkpoint, gat.importer.import_fingerprint(source, chunk_size, max_bytes))
+        if checkpoint
+        else None
+    )
+    failed = []
+
+    def get_rows(source_file: IO[bytes]) -> Iterator[List[Any]]:
+        test_cases = gat.importer.iter_test_case_definitions(source_file, data_format, source)
+        for chunk in api.import_test_cases(application, test_cases, chunk_size, max_bytes, jobs, import_checkpoint):
+            if chunk.error is not None:
+                failed.append(chunk)
+            result = "Created before" if chunk.skipped else chunk.error or "Created"
+            yield [chunk.index + 1, f"{chunk.first}-{chunk.first + chunk.count - 1}", len(chunk.test_cases), result]
+
+    with click.open_file(source, "rb") as source_file:
+        echo_table(context, itertools.chain([["Chunk", "Test cases", "Created", "Result"]], get_rows(source_file)))
+
+    if failed:
+        retry = ", run again with the same --checkpoint to send them" if checkpoint else ""
+        raise click.ClickException(f"{len(failed)} chunk(s) failed{retry}")
+
+
+@cli.command()
+@click.option("-a", "--application", "application_id", required=True, help="Application ID.")
+@click.option(
+    "--input-format",
+    "data_format",
+    type=click.Choice(sorted(set(gat.importer.FORMATS.values()))),
+    help="Format of the file, by default guessed from its extension.",
+)
+@click.option("--chunk-size", type=click.IntRange(min=1), default=100, help="Maximum number of test cases per request.")
+@click.option("--chunk-bytes", type=ByteSize(), default="1M", help="Maximum size of a request, e.g. 512K.")
+@click.option("-j", "--jobs", type=click.IntRange(min=1), default=4, help="Number of requests sent at the same time.")
+@click.option("--dry-run", is_flag=True, help="Only show the changes, without making them.")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.pass_context
+def sync_test_cases(
+    context: click.Context,
+    application_id: str,
+    data_format: Optional[str],
+    chunk_size: int,
+    chunk_bytes: float,
+    jobs: int,
+    dry_run: bool,
+    source: str,
+) -> None:
+    """
+    Make the test cases of the given application match the ones defined in a file, in any format of
+    import-test-cases.
+
+    Test cases are matched by section and title. Only new and changed ones are created, a changed one replacing the
+    old version, which gets a new ID; test cases missing from the file are deleted. The changes are shown first.
+    """
+    data_format = guess_format(source, data_format)
+    api = context.obj
+    application = api.application_reference(application_id)
+    with click.open_file(source, "rb") as source_file:
+        local_test_cases = list(gat.importer.iter_test_case_definitions(source_file, data_format, source))
+    plan = api.plan_sync_test_cases(application, local_test_cases)
+    if plan.ignored:
+        click.echo(
+            f"The test cases were listed without {', '.join(plan.ignored)}, only the remaining content was compared",
+            err=True,
+        )
+
+    replaced_keys = set(plan.replaced_keys)
+    table = [["Action", "ID", "Section", "Title"]]
+    table.extend(
+        ["Delete", test_case.id, test_case.section, test_case.title]
+        for test_case in plan.delete
+        if plan.key(test_case) not in replaced_keys
+    )
+    table.extend(
+        ["Replace", test_case.id, test_case.section, test_case.title]
+        for test_case in plan.delete
+        if plan.key(test_case) in replaced_keys
+    )
+    table.extend(
+        ["Create", None, test_case.section, test_case.title]
+        for test_case in plan.create
+        if plan.key(test_case) not in replaced_keys
+    )
+    echo_table(context, table)
+    if dry_run:
+        return
+
+    failed_count = 0
+    for chunk in api.sync_test_cases(application, plan, chunk_size, int(chunk_bytes), jobs):
+        if chunk.error is not None:
+            failed_count += 1
+            click.echo(f"Test cases {chunk.first}-{chunk.first + chunk.count - 1} to create: {chunk.error}", err=True)
+    if failed_count:
+        raise click.ClickException(
+            f"{failed_count} chunk(s) failed, the old versions of their test cases were kept; run the sync again"
+        )
 
 
 @cli.command()
@@ -467,14 +871,14 @@ def list_countries(context: click.Context) -> None:
     List countries available for localized tests.
     """
     api = context.obj
-    table = [["ID", "Name", "Code", "Available platforms"]]
-    table.extend(
-        [
+    table = itertools.chain(
+        [["ID", "Name", "Code", "Available platforms"]],
+        (
             [country.id, country.name, country.code, ", ".join(country.available_platforms)]
-            for country in api.countries()
-        ]
+            for country in api.iter_countries()
+        ),
     )
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+    echo_table(context, table)
 
 
 @cli.command()
@@ -510,63 +914,183 @@ def list_test_case_runs(
     Show a list of test case runs for a given test case batch
     """
     api = context.obj
-    application = api.application_by_id(application_id)
-    test_case_runs = api.test_case_runs(
-        application, batch_id=batch_id, test_case_run_ids=test_case_run_ids, outcome=outcome, importance=importance
+    application = api.application_reference(application_id)
+    test_case_runs = api.iter_test_case_runs(
+        application,
+        batch_id=batch_id,
+        test_case_run_ids=test_case_run_ids,
+        outcome=outcome,
+        importance=importance,
+        stream=True,
     )
 
-    table = [
+    table = itertools.chain(
         [
-            "ID",
-            "Test case name",
-            "Test case section",
-            "Test case importance",
-            "Variation name",
-            "Result outcome",
-            "Reported at",
-            "Country",
-        ]
-    ]
+            [
+                "ID",
+                "Test case name",
+                "Test case section",
+                "Test case importance",
+                "Variation name",
+                "Result outcome",
+                "Reported at",
+                "Country",
+            ]
+        ],
+        get_test_case_run_rows(test_case_runs, repeat=context.meta["gat.output_format"] != "table"),
+    )
+    echo_table(context, table)
+
 
-    test_case_runs_rows = []
+@cli.command()
+@click.option("--fail-fast", "fail_fast", is_flag=True, help="Stop at the first failed command.")
+@click.argument("commands", type=click.File("r"), default="-")
+@click.pass_context
+def batch(context: click.Context, fail_fast: bool, commands: Any) -> None:
+    """
+    Run commands read from a file or standard input, one per line.
 
+    Each line holds a command with its options and arguments, e.g. "list-environments -a 1234". Empty lines and lines
+    starting with # are skipped. All commands share the connections to the API and global options, --deadline applies
+    to each command separately.
+
+    Output of each command is framed by "=== BEGIN <line>: <command>" and "=== END <line>: OK" or
+    "=== END <line>: FAILED: <error>" lines.
+    """
+    api = context.obj
+    deadline = context.meta["gat.deadline"]
+    stdout = click.get_text_stream("stdout")
+    failed_count = 0
+    for line_number, line in enumerate(commands, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        click.echo(f"=== BEGIN {line_number}: {line}")
+        error = None
+        try:
+            arguments = shlex.split(line)
+            command = cli.get_command(context, arguments[0])
+            if command is None or command is batch:
+                raise click.UsageError(f"No such command '{arguments[0]}'.")
+            with command.make_context(arguments[0], arguments[1:], parent=context.parent) as command_context:
+                with api.deadline(deadline) if deadline is not None else contextlib.nullcontext():
+                    command.invoke(command_context)
+        except click.exceptions.Exit:
+            pass
+        except click.ClickException as click_error:
+            error = click_error.format_message()
+        except (gat.GatError, Exception) as command_error:
+            error = str(command_error) or type(command_error).__name__
+        stdout.flush()
+
+        if error is None:
+            click.echo(f"=== END {line_number}: OK")
+        else:
+            click.echo(f"=== END {line_number}: FAILED: {error}")
+            failed_count += 1
+        stdout.flush()
+        if error is not None and fail_fast:
+            break
+
+    if failed_count:
+        raise click.ClickException(f"{failed_count} command(s) failed")
+
+
+def get_test_case_run_rows(test_case_runs: Iterable[gat.TestCaseRun], repeat: bool) -> Iterator[List[Any]]:
+    # Tables only show test case run and variation for their first result, other formats repeat them in every row
     for test_case_run in test_case_runs:
-        first_variation = test_case_run.variations[0]
-        first_result = first_variation.results[0]
-        test_case_runs_rows.append(
+        test_case_run_columns = [
+            test_case_run.id,
+            test_case_run.test_case_name,
+            test_case_run.test_case_section,
+            test_case_run.test_case_importance,
+        ]
+        for variation_index, variation in enumerate(test_case_run.variations):
+            for result_index, result in enumerate(variation.results):
+                first_of_run = variation_index == 0 and result_index == 0
+                yield [
+                    *(test_case_run_columns if repeat or first_of_run else [""] * 4),
+                    variation.name if repeat or result_index == 0 else "",
+                    result.outcome,
+                    result.reported_at,
+                    result.country,
+                ]
+
+
+def echo_profile(
+    metrics: gat.GatMetrics, trace_path: Optional[str], rate_controller: Optional[gat.GatRateController]
+) -> None:
+    import tabulate
+
+    table = [["Endpoint", "Calls", "Errors", "p50 ms", "p95 ms", "p99 ms", "KiB", "Retries", "Network ms", "Parse ms"]]
+    for stats in metrics.summary():
+        table.append(
             [
-                test_case_run.id,
-                test_case_run.test_case_name,
-                test_case_run.test_case_section,
-                test_case_run.test_case_importance,
-                first_variation.name,
-                first_result.outcome,
-                first_result.reported_at,
-                first_result.country,
+                stats.endpoint,
+                stats.count,
+                stats.errors,
+                stats.p50 * 1000,
+                stats.p95 * 1000,
+                stats.p99 * 1000,
+                stats.bytes / 1024,
+                stats.retries,
+                stats.network_time * 1000,
+                stats.parse_time * 1000,
             ]
         )
+    click.echo(tabulate.tabulate(table, headers="firstrow", floatfmt=".1f"), err=True)
+    if rate_controller:
+        limits = rate_controller.limits()
+        rate = "unlimited" if limits.rate is None else f"{limits.rate:.1f}"
+        message = f"Throttling: {limits.concurrency} concurrent calls, {rate} calls/sec, {limits.decreases} decreases"
+        click.echo(message, err=True)
+    if trace_path:
+        metrics.write_trace(trace_path)
+        click.echo(f"Trace written to {trace_path}", err=True)
 
-        for result in first_variation.results[1:]:
-            test_case_runs_rows.append(get_result_row(result))
 
-        for variation in test_case_run.variations[1:]:
-            first_result = variation.results[0]
-            test_case_runs_rows.append(
-                ["", "", "", "", variation.name, first_result.outcome, first_result.reported_at, first_result.country]
-            )
+def format_value(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime.datetime) else str(value)
 
-            for result in variation.results[1:]:
-                test_case_runs_rows.append(get_result_row(result))
 
-    table.extend(test_case_runs_rows)
-    click.echo(tabulate.tabulate(table, headers="firstrow"))
+def guess_format(source: str, data_format: Optional[str]) -> str:
+    data_format = data_format or (gat.importer.source_format(source) if source != "-" else None)
+    if data_format is None:
+        raise click.UsageError("Unable to guess the format of the file, use --input-format")
+    return data_format
 
 
-def get_result_row(result: gat.TestCaseRun.Variation.TestCaseRunResult) -> List[str]:
-    row = [""] * 5
-    row.extend([result.outcome, result.reported_at, result.country])
+def echo_table(context: click.Context, table: Iterable[List[Any]]) -> None:
+    # The first row holds headers; formats other than table write each row as soon as it is produced
+    output_format = context.meta["gat.output_format"]
+    rows = iter(table)
+    headers = next(rows)
+    if output_format == "table":
+        import tabulate
+
+        click.echo(tabulate.tabulate([headers, *rows], headers="firstrow"))
+        return
+
+    stream = click.get_text_stream("stdout")
+    if output_format == "csv":
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(["" if value is None else format_value(value) for value in row])
+        stream.flush()
+        return
 
-    return row
+    keys = [re.sub(r"\W+", "_", header.lower()).strip("_") for header in headers]
+    separator = "[\n" if output_format == "json" else ""
+    for row in rows:
+        stream.write(separator + json.dumps(dict(zip(keys, row)), default=format_value))
+        separator = ",\n" if output_format == "json" else "\n"
+    if output_format == "json":
+        stream.write("[]\n" if separator == "[\n" else "\n]\n")
+    elif separator:
+        stream.write("\n")
+    stream.flush()
 
 
 if __name__ == "__main__":
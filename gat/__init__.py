@@ -1,12 +1,20 @@
 #!/usr/bin/env python3
 
-from .client import GatApi, GatError
+from typing import Any
+
+from .cache import GatCache, GatCacheEntry, GatHttpCache
+from .cassette import GatCassette
+from .client import GatApi, GatBulkError, GatError
+from .codec import GatJsonCodec, GatOrjsonCodec
+from .coalescing import GatCoalescingStats, GatRequestCoalescer
 from .data import (
     Application,
     EmbeddedTestCase,
     Environment,
     GatApiConfiguration,
+    GatRetryPolicy,
     InternetBrowser,
+    LazyApplication,
     MobileDevice,
     NativeBuild,
     Organization,
@@ -18,3 +26,25 @@ from .data import (
     TestCaseRunsBatchSummary,
     TestCaseRunsBatchTestCaseRun,
 )
+from .importer import GatImportCheckpoint, GatImportChunk
+from .metrics import GatEndpointStats, GatMetrics
+from .sync import GatSyncPlan
+from .throttle import GatRateController, GatRateLimits
+from .transport import (
+    GatHttpxTransport,
+    GatRequestsTransport,
+    GatResponse,
+    GatTransport,
+    GatTransportError,
+    GatUrllib3Transport,
+)
+from .upload import GatBandwidthLimiter, GatMultipartEncoder, GatUploadIndex
+
+
+def __getattr__(name: str) -> Any:
+    # The asynchronous client imports asyncio, which is only worth its start-up time when actually used
+    if name == "GatAsyncApi":
+        from .async_client import GatAsyncApi
+
+        return GatAsyncApi
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
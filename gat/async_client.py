@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+
+import asyncio
+import logging
+import os
+import time
+import urllib.parse
+from typing import Any, AsyncIterator, Awaitable, Callable, ContextManager, Dict, Iterable, List, Optional, TypeVar
+
+from . import parsing, transport
+from .client import GatApi, GatError, MAX_URL_LENGTH, bulk_delete_error
+from .data import (
+    Application,
+    Country,
+    Environment,
+    GatApiConfiguration,
+    InternetBrowser,
+    MobileDevice,
+    NativeBuild,
+    Organization,
+    TestCase,
+    TestCaseRun,
+    TestCaseRunsBatch,
+    TestCaseRunsBatchState,
+    TestCaseRunsBatchSummary,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class GatAsyncApi:
+    """
+    Asynchronous counterpart of GatApi. Of the configuration, it uses the key, root, keep_alive, timeouts, retry policy,
+    codec and metrics, and pool_maxsize unless concurrency or pool_size are given; http_cache, cache, rate_controller,
+    throttle, coalescer, prewarm, cassette, upload_index and transport_factory are not supported and ignored.
+    """
+
+    def __init__(
+        self, configuration: GatApiConfiguration, concurrency: Optional[int] = None, pool_size: Optional[int] = None
+    ):
+        self.__configuration = configuration
+        self.__concurrency = concurrency or configuration.pool_maxsize
+        self.__pool_size = pool_size or configuration.pool_maxsize
+        self.__session: Any = None
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+        self.__logger = logging.getLogger("gat.GatAsyncApi")
+        self.__logger.debug("Using key: %s...%s", self.__configuration.key[:4], self.__configuration.key[-4:])
+
+    async def __aenter__(self) -> "GatAsyncApi":
+        return self
+
+    async def __aexit__(self, *exc_info: Any):
+        await self.close()
+
+    async def close(self):
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+
+    def __get_session(self) -> Any:
+        if self.__session is None:
+            # aiohttp is an optional dependency, install with the "async" extra
+            import aiohttp
+
+            self.__session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.__pool_size, force_close=not self.__configuration.keep_alive),
+                headers=transport.default_headers(self.__configuration),
+            )
+            self.__semaphore = asyncio.Semaphore(self.__concurrency)
+        return self.__session
+
+    async def __call(
+        self,
+        method: str,
+        suffix: str,
+        json_data: Optional[Dict[str, Any]] = None,
+        data: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        import aiohttp
+
+        session = self.__get_session()
+        final_url = suffix if suffix.startswith("http") else os.path.join(self.__configuration.uri, suffix)
+        self.__logger.info("Final URI: %s", final_url)
+
+        if headers is None:
+            headers = {"Content-Type": "application/vnd.api+json"} if data else {}
+        policy = self.__configuration.retry
+        metrics = self.__configuration.metrics
+        uri, uri_length = self.__configuration.uri, len(self.__configuration.uri)
+        path = final_url[uri_length:] if final_url.startswith(uri) else final_url
+        # Multipart bodies are consumed on sending and cannot be sent again
+        max_attempts = 1 if isinstance(data, aiohttp.FormData) else policy.max_attempts
+        attempt = 1
+        call_start_time = time.perf_counter()
+        while True:
+            try:
+                async with self.__semaphore:
+                    start_time = time.perf_counter()
+                    async with session.request(
+                        method, final_url, headers=headers, json=json_data, data=data, timeout=self.__timeout()
+                    ) as response:
+                        elapsed_time = time.perf_counter() - start_time
+                        if attempt >= max_attempts or not policy.can_retry(method, status_code=response.status):
+                            self.__logger.info(
+                                "Response status code: %d, in %.3f sec, %d retries",
+                                response.status,
+                                elapsed_time,
+                                attempt - 1,
+                            )
+                            # Like in GatApi, the time of a call includes its retries
+                            content = await response.read()
+                            network_time = time.perf_counter() - call_start_time
+                            parse_start_time = time.perf_counter()
+                            try:
+                                return self.__handle_response(response, content)
+                            finally:
+                                if metrics:
+                                    metrics.record(
+                                        method,
+                                        path,
+                                        call_start_time,
+                                        network_time,
+                                        time.perf_counter() - parse_start_time,
+                                        len(content),
+                                        attempt - 1,
+                                        response.status,
+                                    )
+                        retry_after = policy.retry_after(response.headers)
+                        delay = policy.backoff(attempt) if retry_after is None else retry_after
+                        self.__logger.warning(
+                            "Call failed: %d, retrying in %.1f sec (attempt %d of %d)",
+                            response.status,
+                            delay,
+                            attempt + 1,
+                            max_attempts,
+                        )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                connect_error = isinstance(error, aiohttp.ClientConnectorError)
+                # Timeouts have no message, their type tells what happened
+                reason = str(error) or type(error).__name__
+                if attempt >= max_attempts or not policy.can_retry(method, connect_error=connect_error):
+                    if metrics:
+                        metrics.record(method, path, call_start_time, time.perf_counter() - call_start_time)
+                    raise GatError(f"Call failed: {reason}") from error
+                delay = policy.backoff(attempt)
+                self.__logger.warning(
+                    "Call failed: %s, retrying in %.1f sec (attempt %d of %d)", reason, delay, attempt + 1, max_attempts
+                )
+            remaining_time = GatApi.remaining_time()
+            if remaining_time is not None and remaining_time <= delay:
+                raise GatError("Call failed: deadline exceeded")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def __timeout(self) -> Any:
+        import aiohttp
+
+        remaining_time = GatApi.remaining_time()
+        if remaining_time is not None and remaining_time <= 0:
+            raise GatError("Call failed: deadline exceeded")
+        return aiohttp.ClientTimeout(
+            total=remaining_time,
+            sock_connect=self.__configuration.connect_timeout,
+            sock_read=self.__configuration.read_timeout,
+        )
+
+    def deadline(self, seconds: float) -> ContextManager[None]:
+        return GatApi.deadline(seconds)
+
+    def __handle_response(self, response: Any, content: bytes) -> Any:
+        # The body is decoded by the codec of the configuration, like in GatApi
+        codec = self.__configuration.codec
+        if response.status in [200, 201] and "application/vnd.api+json" in response.headers["Content-Type"]:
+            return codec.loads(content)
+        elif response.status in [200, 201]:
+            return content.decode(response.get_encoding())
+        elif response.status == 204:
+            return
+        elif 400 <= response.status < 500:
+            try:
+                json_response = codec.loads(content)
+            except ValueError:
+                json_response = None
+            raise GatError(parsing.parse_error(response.status, json_response))
+        raise GatError(parsing.parse_error(response.status, None))
+
+    async def __paginate(self, suffix: str, prefetch: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        response = await self.__call("GET", suffix)
+        while True:
+            next_link = (response.get("links") or {}).get("next")
+            next_url = urllib.parse.urljoin(self.__configuration.uri + "/", next_link) if next_link else None
+            next_page = asyncio.ensure_future(self.__call("GET", next_url)) if next_url and prefetch else None
+            try:
+                for item in response["data"] or []:
+                    yield item
+            except BaseException:
+                if next_page:
+                    next_page.cancel()
+                raise
+            if not next_url:
+                return
+            response = await next_page if next_page else await self.__call("GET", next_url)
+
+    async def map(self, function: Callable[[T], Awaitable[R]], items: Iterable[T]) -> List[R]:
+        return list(await asyncio.gather(*(function(item) for item in items)))
+
+    async def whoami(self) -> Organization:
+        return parsing.parse_organization((await self.__call("GET", "whoami"))["data"])
+
+    async def iter_applications(self, prefetch: bool = False) -> AsyncIterator[Application]:
+        async for app in self.__paginate("applications", prefetch):
+            yield parsing.parse_application(app)
+
+    async def applications(self) -> List[Application]:
+        return [application async for application in self.iter_applications()]
+
+    async def application_by_id(self, id: str) -> Application:
+        try:
+            return next(application for application in await self.applications() if application.id == id)
+        except StopIteration as stop_iteration:
+            raise GatError(f"No application with ID {id}") from stop_iteration
+
+    async def iter_environments(self, application: Application, prefetch: bool = False) -> AsyncIterator[Environment]:
+        async for env in self.__paginate(f"applications/{application.id}/environments", prefetch):
+            yield parsing.parse_environment(env)
+
+    async def environments(self, application: Application) -> List[Environment]:
+        return [environment async for environment in self.iter_environments(application)]
+
+    async def environment_by_id(self, application: Application, id: str) -> Environment:
+        try:
+            return next(environment for environment in await self.environments(application) if environment.id == id)
+        except StopIteration as stop_iteration:
+            raise GatError(f"No environment with ID {id}") from stop_iteration
+
+    async def create_environment(self, application: Application, name: str, url: str) -> Environment:
+        new_env = await self.__call(
+            "POST", f"applications/{application.id}/environments", json_data=parsing.environment_payload(name, url),
+        )
+        return parsing.parse_environment(new_env["data"])
+
+    async def delete_environment(self, application: Application, environment: Environment):
+        await self.__call("DELETE", f"applications/{application.id}/environments/{environment.id}")
+
+    async def update_environment(
+        self, application: Application, environment: Environment, name: str, url: str
+    ) -> Environment:
+        new_env = await self.__call(
+            "PATCH",
+            f"applications/{application.id}/environments/{environment.id}",
+            json_data=parsing.environment_payload(name, url),
+        )
+        return parsing.parse_environment(new_env["data"])
+
+    async def iter_native_builds(self, application: Application, prefetch: bool = False) -> AsyncIterator[NativeBuild]:
+        async for build in self.__paginate(f"applications/{application.id}/native_application_builds", prefetch):
+            yield parsing.parse_native_build(build)
+
+    async def native_builds(self, application: Application) -> List[NativeBuild]:
+        return [native_build async for native_build in self.iter_native_builds(application)]
+
+    async def native_build_by_id(self, application: Application, id: str) -> NativeBuild:
+        try:
+            return next(native_build for native_build in await self.native_builds(application) if native_build.id == id)
+        except StopIteration as stop_iteration:
+            raise GatError(f"No native build with ID {id}") from stop_iteration
+
+    async def delete_native_build(self, application: Application, id: str):
+        await self.__call("DELETE", f"applications/{application.id}/native_application_builds/{id}")
+
+    async def update_native_build(self, application: Application, native_build: NativeBuild, name: str) -> NativeBuild:
+        new_build = await self.__call(
+            "PATCH",
+            f"applications/{application.id}/native_application_builds/{native_build.id}",
+            json_data=parsing.native_build_payload(name),
+        )
+        return parsing.parse_native_build(new_build["data"])
+
+    async def create_native_build(self, application: Application, name: str, build: str) -> NativeBuild:
+        suffix = f"applications/{application.id}/native_application_builds"
+        if build.startswith("http"):
+            form = {key: value for key, value in parsing.native_build_form(name, build).items() if value is not None}
+            new_build = await self.__call("POST", suffix, data=form, headers={"Content-Type": "multipart/form-data"})
+        else:
+            import aiohttp
+
+            with open(build, "rb") as build_file:
+                form_data = aiohttp.FormData()
+                for key, value in parsing.native_build_form(name, None).items():
+                    if value is not None:
+                        form_data.add_field(key, value)
+                form_data.add_field("data[attributes][app_file]", build_file, filename=os.path.basename(build))
+                new_build = await self.__call("POST", suffix, data=form_data, headers={})
+        return parsing.parse_native_build(new_build["data"])
+
+    async def iter_internet_browsers(self, prefetch: bool = False) -> AsyncIterator[InternetBrowser]:
+        async for ib in self.__paginate("internet_browsers", prefetch):
+            yield parsing.parse_internet_browser(ib)
+
+    async def internet_browsers(self) -> List[InternetBrowser]:
+        return [internet_browser async for internet_browser in self.iter_internet_browsers()]
+
+    async def iter_mobile_devices(self, prefetch: bool = False) -> AsyncIterator[MobileDevice]:
+        async for md in self.__paginate("mobile_devices", prefetch):
+            yield parsing.parse_mobile_device(md)
+
+    async def mobile_devices(self) -> List[MobileDevice]:
+        return [mobile_device async for mobile_device in self.iter_mobile_devices()]
+
+    async def test_case_runs_batch_state(self, application: Application, id: str) -> TestCaseRunsBatchState:
+        state_response = await self.__call("GET", f"applications/{application.id}/test_case_runs_batches/{id}/state")
+        return parsing.parse_test_case_runs_batch_state(state_response["data"])
+
+    async def test_case_runs_batch_summary(self, application: Application, id: str) -> TestCaseRunsBatchSummary:
+        return parsing.parse_test_case_runs_batch_summary(
+            await self.__call("GET", f"applications/{application.id}/test_case_runs_batches/{id}/summary")
+        )
+
+    async def create_test_case_runs_batch(
+        self,
+        application: Application,
+        environment: Environment,
+        internet_browsers: List[InternetBrowser],
+        test_cases: List[TestCase],
+    ) -> TestCaseRunsBatch:
+        test_case_runs_batch_response = await self.__call(
+            "POST",
+            f"applications/{application.id}/test_case_runs_batches",
+            json_data=parsing.test_case_runs_batch_payload(environment, internet_browsers, test_cases),
+        )
+        return parsing.parse_test_case_runs_batch(test_case_runs_batch_response["data"])
+
+    async def iter_test_cases(self, application: Application, prefetch: bool = False) -> AsyncIterator[TestCase]:
+        async for test_case in self.__paginate(f"applications/{application.id}/test_cases", prefetch):
+            yield parsing.parse_test_case(test_case)
+
+    async def test_cases(self, application: Application) -> List[TestCase]:
+        return [test_case async for test_case in self.iter_test_cases(application)]
+
+    async def delete_all_test_cases(self, application: Application):
+        await self.__call("DELETE", f"applications/{application.id}/test_cases/delete_all")
+
+    async def delete_test_cases(self, application: Application, ids: List[str]):
+        # Split like GatApi.delete_test_cases, the calls are limited by the concurrency of the client
+        suffix = f"applications/{application.id}/test_cases"
+        url_length = len(os.path.join(self.__configuration.uri, suffix))
+
+        async def delete(chunk: List[str]) -> Optional[GatError]:
+            try:
+                await self.__call("DELETE", suffix + parsing.test_case_ids_query(chunk))
+            except GatError as error:
+                return error
+            return None
+
+        chunks = parsing.test_case_ids_chunks(ids, MAX_URL_LENGTH - url_length)
+        failures = [(chunk, error) for chunk, error in zip(chunks, await self.map(delete, chunks)) if error]
+        if failures:
+            raise bulk_delete_error("test cases", failures, len(ids))
+
+    async def create_test_cases(self, application: Application, test_cases: List[TestCase]) -> List[TestCase]:
+        created_response = await self.__call(
+            "POST",
+            f"applications/{application.id}/test_cases/import",
+            json_data=parsing.test_cases_payload(test_cases),
+        )
+        return [parsing.parse_created_test_case(test_case) for test_case in created_response["data"]]
+
+    async def iter_countries(self, prefetch: bool = False) -> AsyncIterator[Country]:
+        async for country in self.__paginate("countries", prefetch):
+            yield parsing.parse_country(country)
+
+    async def countries(self) -> List[Country]:
+        return [country async for country in self.iter_countries()]
+
+    async def iter_test_case_runs(
+        self,
+        application: Application,
+        batch_id: str,
+        test_case_run_ids: Optional[List[str]],
+        outcome: Optional[str],
+        importance: Optional[str],
+        prefetch: bool = False,
+    ) -> AsyncIterator[TestCaseRun]:
+        async for test_case_run in self.__paginate(
+            f"applications/{application.id}/test_case_runs_batches/{batch_id}/test_case_runs"
+            f"{parsing.test_case_runs_query(test_case_run_ids, outcome, importance)}",
+            prefetch,
+        ):
+            yield parsing.parse_test_case_run(test_case_run)
+
+    async def test_case_runs(
+        self,
+        application: Application,
+        batch_id: str,
+        test_case_run_ids: Optional[List[str]],
+        outcome: Optional[str],
+        importance: Optional[str],
+    ) -> List[TestCaseRun]:
+        return [
+            test_case_run
+            async for test_case_run in self.iter_test_case_runs(
+                application, batch_id, test_case_run_ids, outcome, importance
+            )
+        ]
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+import collections
+import dataclasses
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .codec import GatJsonCodec, default_codec
+
+
+def default_cache_directory() -> str:
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "gat-cli")
+
+
+@dataclasses.dataclass(frozen=True)
+class GatCacheEntry:
+    endpoint: str
+    body: Any
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    size: int = 0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+class GatCache:
+    DEFAULT_TTLS = {
+        "applications": 300.0,
+        "internet_browsers": 86400.0,
+        "mobile_devices": 86400.0,
+        "countries": 86400.0,
+    }
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_while_revalidate: float = 3600.0,
+        max_size: int = 16 * 1024 * 1024,
+        refresh: bool = False,
+        codec: Optional[GatJsonCodec] = None,
+    ):
+        self.directory = directory or default_cache_directory()
+        self.ttls = dict(self.DEFAULT_TTLS if ttls is None else ttls)
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_size = max_size
+        self.refresh = refresh
+        self.codec = codec or default_codec()
+        self.__logger = logging.getLogger("gat.GatCache")
+
+    def ttl(self, endpoint: str) -> Optional[float]:
+        return self.ttls.get(endpoint)
+
+    def key(self, uri: str, api_key: str, endpoint: str) -> str:
+        return hashlib.sha256("\0".join([uri, api_key, endpoint]).encode("utf-8")).hexdigest()
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[GatCacheEntry]:
+        path = self.__path(key)
+        try:
+            with open(path, "rb") as cache_file:
+                content = self.codec.loads(cache_file.read())
+            # Touch the entry so that eviction removes the least recently used ones first
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return GatCacheEntry(
+            endpoint=content["endpoint"],
+            body=content["body"],
+            stored_at=content["stored_at"],
+            etag=content.get("etag"),
+            last_modified=content.get("last_modified"),
+            size=content.get("size", 0),
+        )
+
+    def put(
+        self,
+        key: str,
+        endpoint: str,
+        body: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        size: int = 0,
+    ):
+        import tempfile
+
+        content = {"endpoint": endpoint, "stored_at": time.time(), "body": body}
+        if etag is not None or last_modified is not None:
+            content.update({"etag": etag, "last_modified": last_modified, "size": size})
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            handle, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(handle, "wb") as cache_file:
+                cache_file.write(self.codec.dumps(content))
+            os.replace(temporary_path, self.__path(key))
+        except OSError as error:
+            self.__logger.warning("Unable to store %s in cache: %s", endpoint, error)
+            return
+        self.__evict()
+
+    def clear(self):
+        for entry in self.__entries():
+            os.remove(entry.path)
+
+    def __entries(self) -> List[os.DirEntry]:
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+
+    def __evict(self):
+        entries = []
+        for entry in self.__entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self.__logger.debug("Evicting %s from cache", path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+
+class GatHttpCache:
+    def __init__(self, max_size: int = 4 * 1024 * 1024, disk: Optional[GatCache] = None):
+        self.max_size = max_size
+        self.disk = disk
+        self.__entries: "collections.OrderedDict[str, GatCacheEntry]" = collections.OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+    def key(self, api_key: str, url: str) -> str:
+        return hashlib.sha256("\0".join([url, api_key]).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[GatCacheEntry]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                self.__entries.move_to_end(key)
+                return entry
+        entry = self.disk.get(key) if self.disk else None
+        if entry is not None:
+            self.__remember(key, entry)
+        return entry
+
+    def put(self, key: str, endpoint: str, body: Any, etag: Optional[str], last_modified: Optional[str], size: int):
+        # Size of the response body, which bounds the memory used by stored entries
+        entry = GatCacheEntry(
+            endpoint=endpoint, body=body, stored_at=time.time(), etag=etag, last_modified=last_modified, size=size
+        )
+        self.__remember(key, entry)
+        if self.disk:
+            self.disk.put(key, endpoint, body, etag, last_modified, size)
+
+    def __remember(self, key: str, entry: GatCacheEntry):
+        with self.__lock:
+            previous_entry = self.__entries.pop(key, None)
+            if previous_entry is not None:
+                self.__size -= previous_entry.size
+            self.__entries[key] = entry
+            self.__size += entry.size
+            while self.__size > self.max_size:
+                _, evicted_entry = self.__entries.popitem(last=False)
+                self.__size -= evicted_entry.size
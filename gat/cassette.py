@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+import base64
+import collections
+import gzip
+import json
+import logging
+import threading
+import time
+from typing import Any, Deque, Dict, IO, List, Optional, Tuple, Union
+
+from .errors import GatError
+from .transport import GatResponse, GatTransport, GatTransportError, Timeout
+
+# Headers describing the transfer rather than the content, the recorded body is already decoded
+SKIPPED_HEADERS = frozenset(["content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"])
+
+
+class GatCassette:
+    def __init__(self, path: str, mode: str = "replay", replay_latency: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.__file: Optional[IO[str]] = None
+        self.__exchanges: Optional[Dict[Tuple[str, str], Deque[Dict[str, Any]]]] = None
+        self.__lock = threading.Lock()
+        self.__logger = logging.getLogger("gat.GatCassette")
+
+    def __enter__(self) -> "GatCassette":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
+
+    def close(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    def wrap(self, transport: GatTransport) -> GatTransport:
+        return _RecordingTransport(self, transport) if self.mode == "record" else _ReplayingTransport(self, transport)
+
+    def record(self, method: str, url: str, response: Any, elapsed: float):
+        # Only the request line is stored, so neither the API key nor uploaded files end up in the cassette
+        exchange = {
+            "method": method,
+            "url": url,
+            "status": response.status_code,
+            "headers": {name: value for name, value in response.headers.items() if name.lower() not in SKIPPED_HEADERS},
+            "elapsed": round(elapsed, 6),
+        }
+        try:
+            exchange["body"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            exchange["body_base64"] = base64.b64encode(response.content).decode("ascii")
+        line = json.dumps(exchange, separators=(",", ":")) + "\n"
+        with self.__lock:
+            if self.__file is None:
+                self.__file = gzip.open(self.path, "wt", encoding="utf-8")
+            self.__file.write(line)
+
+    def replay(self, method: str, url: str) -> Optional[Dict[str, Any]]:
+        # Exchanges of the same request are replayed in the recorded order, the last one is repeated once they run out
+        with self.__lock:
+            if self.__exchanges is None:
+                self.__exchanges = self.__load()
+            exchanges = self.__exchanges.get((method, url))
+            if not exchanges:
+                return None
+            return exchanges.popleft() if len(exchanges) > 1 else exchanges[0]
+
+    def __load(self) -> Dict[Tuple[str, str], Deque[Dict[str, Any]]]:
+        exchanges: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = collections.defaultdict(collections.deque)
+        with gzip.open(self.path, "rt", encoding="utf-8") as cassette_file:
+            for line in cassette_file:
+                exchange = json.loads(line)
+                exchanges[(exchange["method"], exchange["url"])].append(exchange)
+        self.__logger.debug("Loaded %d distinct requests from %s", len(exchanges), self.path)
+        return exchanges
+
+
+class _RecordingTransport(GatTransport):
+    def __init__(self, cassette: GatCassette, transport: GatTransport):
+        self.__cassette = cassette
+        self.__transport = transport
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Timeout,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], IO[bytes]]] = None,
+        files: Optional[List[Tuple[str, IO]]] = None,
+        stream: bool = False,
+    ) -> Any:
+        # Streamed responses are read in full when recorded, the body remains available to iter_content()
+        start_time = time.perf_counter()
+        response = self.__transport.request(method, url, headers, timeout, json, data, files, stream)
+        self.__cassette.record(method, url, response, time.perf_counter() - start_time)
+        return response
+
+    def close(self):
+        self.__transport.close()
+
+
+class _ReplayingTransport(GatTransport):
+    def __init__(self, cassette: GatCassette, transport: GatTransport):
+        self.__cassette = cassette
+        self.__transport = transport
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Timeout,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], IO[bytes]]] = None,
+        files: Optional[List[Tuple[str, IO]]] = None,
+        stream: bool = False,
+    ) -> Any:
+        try:
+            from urllib3 import HTTPHeaderDict
+        except ImportError:
+            # urllib3 1.x only has it in its response module
+            from urllib3.response import HTTPHeaderDict
+
+        exchange = self.__cassette.replay(method, url)
+        if exchange is None:
+            # Not a transport error, which would be retried
+            raise GatError(f"Call failed: {method} {url} is not recorded in {self.__cassette.path}")
+
+        if self.__cassette.replay_latency:
+            read_timeout = timeout[1]
+            if read_timeout is not None and exchange["elapsed"] > read_timeout:
+                time.sleep(read_timeout)
+                raise GatTransportError(f"Replayed read timed out ({read_timeout} sec)")
+            time.sleep(exchange["elapsed"])
+
+        body = exchange["body"].encode("utf-8") if "body" in exchange else base64.b64decode(exchange["body_base64"])
+        headers = HTTPHeaderDict(exchange["headers"])
+        headers["Content-Length"] = str(len(body))
+        return GatResponse(exchange["status"], headers, body)
+
+    def close(self):
+        self.__transport.close()
@@ -1,66 +1,185 @@
 #!/usr/bin/env python3
 
-import datetime
+import collections
+import contextlib
+import contextvars
 import json
 import logging
 import os
+import threading
 import time
-from typing import Any, Dict, IO, List, Optional, Tuple
+import urllib.parse
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar, Union
 
+from . import importer, parsing, streaming, sync
 from .data import (
     Application,
     Country,
     Environment,
     GatApiConfiguration,
     InternetBrowser,
+    LazyApplication,
     MobileDevice,
     NativeBuild,
     Organization,
     TestCase,
-    TestCaseInstruction,
     TestCaseRun,
     TestCaseRunsBatch,
     TestCaseRunsBatchState,
     TestCaseRunsBatchSummary,
-    TestCaseRunsBatchTestCaseRun,
 )
+from .errors import GatBulkError, GatError
+from .importer import GatImportCheckpoint, GatImportChunk
+from .sync import GatSyncPlan
+from .transport import GatTransportError
+from .upload import GatBandwidthLimiter, GatMultipartEncoder, GatUploadIndex, Progress, file_digest
 
+T = TypeVar("T")
+R = TypeVar("R")
 
-class GatError(BaseException):
-    pass
+
+# Longest URL sent by bulk operations, which split their calls to stay below it
+MAX_URL_LENGTH = 2000
+# Longest wait for the pre-warmed connection when connecting has no timeout
+MAX_PREWARM_WAIT = 10.0
+
+
+def bulk_delete_error(items: str, failures: List[Tuple[List[str], GatError]], total: int) -> GatBulkError:
+    failed_ids = [id for ids, _ in failures for id in ids]
+    errors = [error for _, error in failures]
+    return GatBulkError(f"Deleting {len(failed_ids)} of {total} {items} failed: {errors[0]}", failed_ids, errors)
 
 
 class GatApi:
+    # Monotonic time by which all calls made in the current context have to finish
+    __deadline: contextvars.ContextVar = contextvars.ContextVar("gat_deadline", default=None)
+
     def __init__(self, configuration: GatApiConfiguration):
         self.__configuration = configuration
         self.__logger = logging.getLogger("gat.GatApi")
         self.__logger.debug("Using key: %s...%s", self.__configuration.key[:4], self.__configuration.key[-4:])
+        self.__refreshing: Set[str] = set()
+        self.__refreshing_lock = threading.Lock()
+        self.__prewarming: Optional[threading.Thread] = None
+        if configuration.prewarm:
+            self.prewarm()
+
+    def prewarm(self):
+        # Resolve the host and open a pooled connection in the background, e.g. while the command line is parsed, so
+        # that the first call does not pay for the TCP and TLS handshakes
+        if self.__prewarming is not None or self.__configuration.cassette is not None:
+            return
+
+        def warm_up():
+            start_time = time.monotonic()
+            try:
+                configuration = self.__configuration
+                timeout = (configuration.connect_timeout, configuration.read_timeout)
+                configuration.transport.request("HEAD", configuration.root, {}, timeout).close()
+            except Exception as error:
+                self.__logger.debug("Unable to pre-warm connection: %s", error)
+            else:
+                self.__logger.debug("Connection pre-warmed in %.3f sec", time.monotonic() - start_time)
+
+        self.__prewarming = threading.Thread(target=warm_up, name="gat-prewarm", daemon=True)
+        self.__prewarming.start()
 
     def __call(
         self,
         method: str,
         suffix: str,
         json_data: Optional[Dict[str, Any]] = None,
-        data: Optional[Dict[str, Any]] = None,
-        files: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], GatMultipartEncoder]] = None,
         headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
     ) -> Any:
 
-        final_url = os.path.join(self.__configuration.uri, suffix)
+        final_url = suffix if suffix.startswith("http") else os.path.join(self.__configuration.uri, suffix)
         self.__logger.info("Final URI: %s", final_url)
-        if json_data:
+        if json_data and self.__logger.isEnabledFor(logging.DEBUG):
             self.__logger.debug("Data:\n%s", json.dumps(json_data, sort_keys=True, indent=2))
 
         headers = headers or {"Content-Type": "application/vnd.api+json"} if data else {}
-        start_time = time.time()
-        response = self.__configuration.session.request(
-            method, final_url, headers=headers, json=json_data, data=data, files=files
+
+        coalescer = self.__configuration.coalescer
+        if method != "GET" or stream or coalescer is None:
+            return self.__request(method, final_url, headers, json_data, data, stream)
+        # Identical GET requests made by other threads at the same time share the response of the first one
+        try:
+            return coalescer.run(
+                (self.__configuration.key, final_url),
+                lambda: self.__request(method, final_url, headers),
+                timeout=self.remaining_time(),
+            )
+        except TimeoutError:
+            raise GatError("Call failed: deadline exceeded")
+
+    def __request(
+        self,
+        method: str,
+        final_url: str,
+        headers: Dict[str, str],
+        json_data: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], GatMultipartEncoder]] = None,
+        stream: bool = False,
+    ) -> Any:
+        # Responses with validators are stored, so that the next GET of the same URL only downloads changed bodies
+        http_cache = self.__configuration.http_cache if method == "GET" and not stream else None
+        cache_key = http_cache.key(self.__configuration.key, final_url) if http_cache else None
+        entry = http_cache.get(cache_key) if http_cache else None
+        if entry is not None:
+            headers = dict(headers)
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        metrics = self.__configuration.metrics
+        uri, uri_length = self.__configuration.uri, len(self.__configuration.uri)
+        path = final_url[uri_length:] if final_url.startswith(uri) else final_url
+        start_time = time.perf_counter()
+        try:
+            response, retries = self.__send(
+                method, final_url, headers=headers, json=json_data, data=data, stream=stream
+            )
+        except GatError:
+            if metrics:
+                metrics.record(method, path, start_time, time.perf_counter() - start_time)
+            raise
+        elapsed_time = time.perf_counter() - start_time
+        self.__logger.info(
+            "Response status code: %d, in %.3f sec, %d retries", response.status_code, elapsed_time, retries
         )
-        elapsed_time = time.time() - start_time
-        self.__logger.info("Response status code: %d, in %.3f sec", response.status_code, elapsed_time)
+        if stream or (entry is not None and response.status_code == 304):
+            if metrics:
+                size = int(response.headers.get("Content-Length") or 0)
+                metrics.record(method, path, start_time, elapsed_time, 0.0, size, retries, response.status_code)
+            if stream:
+                return response
+            self.__logger.info("Not modified: %s, %.0f sec old", final_url, entry.age)
+            return entry.body
+
+        parse_start_time = time.perf_counter()
+        try:
+            body = self.__handle_response(response)
+        finally:
+            if metrics:
+                parse_time = time.perf_counter() - parse_start_time
+                size = len(response.content)
+                metrics.record(method, path, start_time, elapsed_time, parse_time, size, retries, response.status_code)
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        no_store = "no-store" in response.headers.get("Cache-Control", "")
+        if http_cache and response.status_code == 200 and (etag or last_modified) and not no_store:
+            http_cache.put(cache_key, final_url, body, etag, last_modified, len(response.content))
+        return body
+
+    def __handle_response(self, response: Any) -> Any:
+        # The body is decoded once, from bytes, by the codec of the configuration
+        codec = self.__configuration.codec
         if response.status_code in [200, 201] and "application/vnd.api+json" in response.headers["Content-Type"]:
-            json_response = response.json()
-            self.__logger.debug("Returned JSON data:\n%s", json.dumps(json_response, sort_keys=True, indent=2))
+            json_response = codec.loads(response.content)
+            if self.__logger.isEnabledFor(logging.DEBUG):
+                self.__logger.debug("Returned JSON data:\n%s", json.dumps(json_response, sort_keys=True, indent=2))
             return json_response
         elif response.status_code in [200, 201]:
             text_data = response.text
@@ -68,27 +187,201 @@ class GatApi:
             return text_data
         elif response.status_code == 204:
             return
-        elif 400 <= response.status_code < 500 and "errors" in response.json():
-            first_error = response.json()["errors"][0]
-            error_message = first_error["title"]
-            if "detail" in first_error:
-                error_message = f"{error_message} - {first_error['detail']}"
-            raise GatError(f"Call failed: {response.status_code}: {error_message}")
-        raise GatError(f"Call failed: {response.status_code}")
+        elif 400 <= response.status_code < 500:
+            try:
+                json_response = codec.loads(response.content)
+            except ValueError:
+                json_response = None
+            raise GatError(parsing.parse_error(response.status_code, json_response))
+        raise GatError(parsing.parse_error(response.status_code, None))
+
+    def __send(self, method: str, url: str, **kwargs: Any) -> Tuple[Any, int]:
+        # Wait for the pre-warmed connection instead of opening another one next to it, at most as long as connecting
+        # may take, after which the call goes on without it
+        prewarming = self.__prewarming
+        if prewarming is not None and prewarming.is_alive():
+            timeouts = [self.__configuration.connect_timeout, self.remaining_time()]
+            wait = min((timeout for timeout in timeouts if timeout is not None), default=MAX_PREWARM_WAIT)
+            prewarming.join(max(wait, 0.0))
+
+        policy = self.__configuration.retry
+        # Uploads and streamed downloads take as long as their size requires, which says nothing about the load of
+        # the API, so only their status is given to the rate controller
+        streamed = kwargs.get("stream") or isinstance(kwargs.get("data"), GatMultipartEncoder)
+        attempt = 1
+        while True:
+            # Streamed bodies are sent again from the start
+            if isinstance(kwargs.get("data"), GatMultipartEncoder):
+                kwargs["data"].seek(0)
+            rate_controller = self.__configuration.rate_controller
+            if rate_controller and not rate_controller.acquire(timeout=self.remaining_time()):
+                raise GatError("Call failed: deadline exceeded")
+            sent_at = time.monotonic()
+            try:
+                response = self.__configuration.transport.request(method, url, timeout=self.__timeout(), **kwargs)
+            except GatTransportError as error:
+                if rate_controller:
+                    rate_controller.release(None if streamed else time.monotonic() - sent_at)
+                if attempt >= policy.max_attempts or not policy.can_retry(method, connect_error=error.connect_error):
+                    raise GatError(f"Call failed: {error}") from error
+                delay = policy.backoff(attempt)
+                reason = error
+            except BaseException:
+                # Not a response of the API, e.g. an interrupt, so the limits are left as they are
+                if rate_controller:
+                    rate_controller.cancel()
+                raise
+            else:
+                if rate_controller:
+                    rate_controller.release(None if streamed else time.monotonic() - sent_at, response.status_code)
+                if attempt >= policy.max_attempts or not policy.can_retry(method, status_code=response.status_code):
+                    return response, attempt - 1
+                retry_after = policy.retry_after(response.headers)
+                delay = policy.backoff(attempt) if retry_after is None else retry_after
+                reason = response.status_code
+                response.close()
+            remaining_time = self.remaining_time()
+            if remaining_time is not None and remaining_time <= delay:
+                raise GatError(f"Call failed: {reason}, deadline exceeded")
+            self.__logger.warning(
+                "Call failed: %s, retrying in %.1f sec (attempt %d of %d)",
+                reason,
+                delay,
+                attempt + 1,
+                policy.max_attempts,
+            )
+            time.sleep(delay)
+            attempt += 1
+
+    def __timeout(self) -> Tuple[Optional[float], Optional[float]]:
+        connect_timeout, read_timeout = self.__configuration.connect_timeout, self.__configuration.read_timeout
+        remaining_time = self.remaining_time()
+        if remaining_time is None:
+            return connect_timeout, read_timeout
+        if remaining_time <= 0:
+            raise GatError("Call failed: deadline exceeded")
+        return (
+            remaining_time if connect_timeout is None else min(connect_timeout, remaining_time),
+            remaining_time if read_timeout is None else min(read_timeout, remaining_time),
+        )
 
     @staticmethod
-    def __parse_time(string_time: Optional[str]) -> Optional[datetime.datetime]:
-        return datetime.datetime.fromisoformat(string_time.replace("Z", "+00:00")) if string_time else None
+    @contextlib.contextmanager
+    def deadline(seconds: float) -> Iterator[None]:
+        deadline = time.monotonic() + seconds
+        current_deadline = GatApi.__deadline.get()
+        token = GatApi.__deadline.set(deadline if current_deadline is None else min(current_deadline, deadline))
+        try:
+            yield
+        finally:
+            GatApi.__deadline.reset(token)
+
+    @staticmethod
+    def remaining_time() -> Optional[float]:
+        deadline = GatApi.__deadline.get()
+        return None if deadline is None else deadline - time.monotonic()
+
+    def __get(self, suffix: str, endpoint: Optional[str] = None) -> Any:
+        cache = self.__configuration.cache
+        ttl = cache.ttl(endpoint or suffix) if cache else None
+        if ttl is None:
+            return self.__call("GET", suffix)
+
+        key = cache.key(self.__configuration.uri, self.__configuration.key, suffix)
+        entry = None if cache.refresh else cache.get(key)
+        if entry is not None and entry.age <= ttl:
+            self.__logger.info("Cache hit: %s, %.0f sec old", suffix, entry.age)
+            return entry.body
+        if entry is not None and entry.age <= ttl + cache.stale_while_revalidate:
+            self.__logger.info("Stale cache hit: %s, %.0f sec old, revalidating", suffix, entry.age)
+            self.__revalidate(suffix, key)
+            return entry.body
+
+        self.__logger.info("Cache miss: %s", suffix)
+        body = self.__call("GET", suffix)
+        cache.put(key, suffix, body)
+        return body
+
+    def __stream(self, suffix: str, members: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        with contextlib.closing(self.__call("GET", suffix, stream=True)) as response:
+            # The body is read after the call, so failures to read it are only known here
+            try:
+                if response.status_code != 200 or "application/vnd.api+json" not in response.headers["Content-Type"]:
+                    self.__handle_response(response)
+                    raise GatError(f"Call failed: {response.status_code}: unexpected response")
+                yield from streaming.iter_array_items(response.iter_content(chunk_size=65536), "data", members)
+            except GatTransportError as error:
+                raise GatError(f"Call failed: {error}") from error
+
+    def __paginate(self, suffix: str, prefetch: bool = False, stream: bool = False) -> Iterator[Dict[str, Any]]:
+        if stream:
+            # Links are only known once the whole page has been read, so the next page cannot be prefetched
+            while suffix:
+                members: Dict[str, Any] = {}
+                yield from self.__stream(suffix, members)
+                next_link = (members.get("links") or {}).get("next")
+                suffix = urllib.parse.urljoin(self.__configuration.uri + "/", next_link) if next_link else None
+            return
+
+        import concurrent.futures
+
+        endpoint = suffix.partition("?")[0]
+        response = self.__get(suffix, endpoint)
+        with contextlib.ExitStack() as stack:
+            executor = (
+                stack.enter_context(concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="gat"))
+                if prefetch
+                else None
+            )
+            while True:
+                next_link = (response.get("links") or {}).get("next")
+                next_url = urllib.parse.urljoin(self.__configuration.uri + "/", next_link) if next_link else None
+                next_page = (
+                    executor.submit(contextvars.copy_context().run, self.__get, next_url, endpoint)
+                    if next_url and executor
+                    else None
+                )
+                yield from response["data"] or []
+                if not next_url:
+                    return
+                response = next_page.result() if next_page else self.__get(next_url, endpoint)
+
+    def __revalidate(self, suffix: str, key: str):
+        with self.__refreshing_lock:
+            if key in self.__refreshing:
+                return
+            self.__refreshing.add(key)
+
+        def refresh():
+            try:
+                self.__configuration.cache.put(key, suffix, self.__call("GET", suffix))
+            except (GatError, Exception) as error:
+                self.__logger.warning("Unable to revalidate %s: %s", suffix, error)
+            finally:
+                with self.__refreshing_lock:
+                    self.__refreshing.discard(key)
+
+        # Not a daemon thread, so that the refreshed entry is written before the interpreter exits
+        threading.Thread(target=refresh, name=f"gat-revalidate-{suffix}").start()
+
+    def map(self, function: Callable[[T], R], items: Iterable[T], max_workers: Optional[int] = None) -> List[R]:
+        import concurrent.futures
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or self.__configuration.pool_maxsize, thread_name_prefix="gat"
+        ) as executor:
+            # Run each call in a copy of the caller's context, so that deadlines apply to the workers as well
+            futures = [executor.submit(contextvars.copy_context().run, function, item) for item in items]
+            return [future.result() for future in futures]
 
     def whoami(self) -> Organization:
-        organization_data = self.__call("GET", "whoami")["data"]
-        return Organization(id=organization_data["id"], name=organization_data["attributes"]["name"])
+        return parsing.parse_organization(self.__call("GET", "whoami")["data"])
+
+    def iter_applications(self, prefetch: bool = False) -> Iterator[Application]:
+        return (parsing.parse_application(app) for app in self.__paginate("applications", prefetch))
 
     def applications(self) -> List[Application]:
-        return [
-            Application(id=app["id"], name=app["attributes"]["name"], platform_name=app["attributes"]["platformName"])
-            for app in self.__call("GET", "applications")["data"]
-        ]
+        return list(self.iter_applications())
 
     def application_by_id(self, id: str) -> Application:
         try:
@@ -96,11 +389,17 @@ class GatApi:
         except StopIteration as stop_iteration:
             raise GatError(f"No application with ID {id}") from stop_iteration
 
+    def application_reference(self, id: str) -> Application:
+        return LazyApplication(id=id, loader=lambda: self.application_by_id(id))
+
+    def iter_environments(self, application: Application, prefetch: bool = False) -> Iterator[Environment]:
+        return (
+            parsing.parse_environment(env)
+            for env in self.__paginate(f"applications/{application.id}/environments", prefetch)
+        )
+
     def environments(self, application: Application) -> List[Environment]:
-        return [
-            Environment(id=env["id"], name=env["attributes"]["name"], url=env["attributes"]["url"])
-            for env in self.__call("GET", f"applications/{application.id}/environments")["data"]
-        ]
+        return list(self.iter_environments(application))
 
     def environment_by_id(self, application: Application, id: str) -> Environment:
         try:
@@ -110,11 +409,9 @@ class GatApi:
 
     def create_environment(self, application: Application, name: str, url: str) -> Environment:
         new_env = self.__call(
-            "POST",
-            f"applications/{application.id}/environments",
-            json_data={"data": {"type": "applicationEnvironment", "attributes": {"name": name, "url": url}}},
+            "POST", f"applications/{application.id}/environments", json_data=parsing.environment_payload(name, url),
         )["data"]
-        return Environment(id=new_env["id"], name=new_env["attributes"]["name"], url=new_env["attributes"]["url"])
+        return parsing.parse_environment(new_env)
 
     def delete_environment(self, application: Application, environment: Environment):
         self.__call("DELETE", f"applications/{application.id}/environments/{environment.id}")
@@ -125,21 +422,18 @@ class GatApi:
         new_env = self.__call(
             "PATCH",
             f"applications/{application.id}/environments/{environment.id}",
-            json_data={"data": {"type": "applicationEnvironment", "attributes": {"name": name, "url": url}}},
+            json_data=parsing.environment_payload(name, url),
         )["data"]
-        return Environment(id=new_env["id"], name=new_env["attributes"]["name"], url=new_env["attributes"]["url"])
+        return parsing.parse_environment(new_env)
+
+    def iter_native_builds(self, application: Application, prefetch: bool = False) -> Iterator[NativeBuild]:
+        return (
+            parsing.parse_native_build(build)
+            for build in self.__paginate(f"applications/{application.id}/native_application_builds", prefetch)
+        )
 
     def native_builds(self, application: Application) -> List[NativeBuild]:
-        return [
-            NativeBuild(
-                id=build["id"],
-                name=build["attributes"]["name"],
-                original_file_name=build["attributes"].get("appFileOriginalFilename"),
-                external_vendor_url=build["attributes"].get("externalVendorUrl"),
-                signing_status=build["attributes"]["signingStatus"],
-            )
-            for build in self.__call("GET", f"applications/{application.id}/native_application_builds")["data"]
-        ]
+        return list(self.iter_native_builds(application))
 
     def native_build_by_id(self, application: Application, id: str) -> NativeBuild:
         try:
@@ -154,111 +448,100 @@ class GatApi:
         new_build = self.__call(
             "PATCH",
             f"applications/{application.id}/native_application_builds/{native_build.id}",
-            json_data={"data": {"type": "nativeApplicationBuild", "attributes": {"name": name}}},
+            json_data=parsing.native_build_payload(name),
         )["data"]
+        return parsing.parse_native_build(new_build)
 
-        return NativeBuild(
-            id=new_build["id"],
-            name=new_build["attributes"]["name"],
-            original_file_name=new_build["attributes"].get("appFileOriginalFilename"),
-            external_vendor_url=new_build["attributes"].get("externalVendorUrl"),
-            signing_status=new_build["attributes"]["signingStatus"],
-        )
-
-    def create_native_build(self, application: Application, name: str, build: str) -> NativeBuild:
-        files = None
-        external_vendor_url = None
-
+    def create_native_build(
+        self,
+        application: Application,
+        name: str,
+        build: str,
+        progress: Optional[Progress] = None,
+        bandwidth_limiter: Optional[GatBandwidthLimiter] = None,
+        dedupe: bool = True,
+    ) -> NativeBuild:
+        suffix = f"applications/{application.id}/native_application_builds"
         if self.__is_url(build):
-            external_vendor_url = build
-        else:
-            files = self.__get_files(build)
-
-        new_build = self.__call(
-            "POST",
-            f"applications/{application.id}/native_application_builds",
-            data={
-                "data[type]": "nativeApplicationBuild",
-                "data[attributes][name]": name,
-                "data[attributes][external_vendor_url]": external_vendor_url,
-            },
-            headers=self.__get_headers_with_content_type(build),
-            files=files,
-        )["data"]
-
-        return NativeBuild(
-            id=new_build["id"],
-            name=new_build["attributes"]["name"],
-            original_file_name=new_build["attributes"].get("appFileOriginalFilename"),
-            external_vendor_url=new_build["attributes"].get("externalVendorUrl"),
-            signing_status=new_build["attributes"]["signingStatus"],
-        )
+            new_build = self.__call(
+                "POST",
+                suffix,
+                data=parsing.native_build_form(name, build),
+                headers=self.__get_headers_with_content_type(build),
+            )["data"]
+            return parsing.parse_native_build(new_build)
+
+        # A file uploaded before is not sent again, the build created from it is returned instead
+        index = self.__configuration.upload_index if dedupe else None
+        scope = index.scope(self.__configuration.uri, self.__configuration.key, application.id) if index else ""
+        size = os.path.getsize(build)
+        if index and index.has_size(scope, size):
+            digest = file_digest(build)
+            existing_build = self.__uploaded_native_build(application, index, scope, digest)
+            if existing_build is not None:
+                self.__logger.info("%s has already been uploaded as native build %s", build, existing_build.id)
+                # The existing build keeps its name, the caller has to know it was not created under the new one
+                if existing_build.name != name:
+                    self.__logger.warning(
+                        "Reusing native build %s named %r instead of creating %r, the content is the same",
+                        existing_build.id,
+                        existing_build.name,
+                        name,
+                    )
+                return existing_build
+
+        # The file is read while it is being sent, and closed afterwards
+        with GatMultipartEncoder(
+            parsing.native_build_form(name, None),
+            [("data[attributes][app_file]", build)],
+            progress=progress,
+            bandwidth_limiter=bandwidth_limiter,
+        ) as body:
+            new_build = parsing.parse_native_build(
+                self.__call("POST", suffix, data=body, headers={"Content-Type": body.content_type})["data"]
+            )
+        if index and build in body.file_digests:
+            index.put(scope, body.file_digests[build], new_build.id, size)
+        return new_build
+
+    def __uploaded_native_build(
+        self, application: Application, index: GatUploadIndex, scope: str, digest: str
+    ) -> Optional[NativeBuild]:
+        build_id = index.get(scope, digest)
+        if build_id is None:
+            return None
+        # The build might have been deleted since, then the file is uploaded again
+        existing_build = next((build for build in self.native_builds(application) if build.id == build_id), None)
+        if existing_build is None:
+            index.remove(scope, digest)
+        return existing_build
 
     @staticmethod
     def __is_url(build: str) -> bool:
         return build.startswith("http")
 
-    @staticmethod
-    def __get_files(path: str) -> List[Tuple[str, IO]]:
-        return [("data[attributes][app_file]", open(path, "rb"))]
-
     def __get_headers_with_content_type(self, build: str) -> Dict[str, str]:
         return {"Content-Type": "multipart/form-data"} if self.__is_url(build) else {}
 
+    def iter_internet_browsers(self, prefetch: bool = False) -> Iterator[InternetBrowser]:
+        return (parsing.parse_internet_browser(ib) for ib in self.__paginate("internet_browsers", prefetch))
+
     def internet_browsers(self) -> List[InternetBrowser]:
-        return [
-            InternetBrowser(
-                id=ib["id"],
-                name=ib["attributes"]["name"],
-                operating_system_name=ib["attributes"]["operatingSystemName"],
-            )
-            for ib in self.__call("GET", "internet_browsers")["data"]
-        ]
+        return list(self.iter_internet_browsers())
+
+    def iter_mobile_devices(self, prefetch: bool = False) -> Iterator[MobileDevice]:
+        return (parsing.parse_mobile_device(md) for md in self.__paginate("mobile_devices", prefetch))
 
     def mobile_devices(self) -> List[MobileDevice]:
-        return [
-            MobileDevice(id=md["id"], name=md["attributes"]["name"], brand_name=md["attributes"]["brandName"])
-            for md in self.__call("GET", "mobile_devices")["data"]
-        ]
+        return list(self.iter_mobile_devices())
 
     def test_case_runs_batch_state(self, application: Application, id: str) -> TestCaseRunsBatchState:
         state_data = self.__call("GET", f"applications/{application.id}/test_case_runs_batches/{id}/state")["data"]
-        return TestCaseRunsBatchState(
-            id=state_data["id"],
-            state=state_data["attributes"]["state"],
-            total_count=state_data["attributes"]["totalCount"],
-            in_progress_count=state_data["attributes"]["inProgressCount"],
-            completed_count=state_data["attributes"]["completedCount"],
-            failed_count=state_data["attributes"]["failedCount"],
-            passed_count=state_data["attributes"]["passedCount"],
-            cancelled_count=state_data["attributes"]["cancelledCount"],
-        )
+        return parsing.parse_test_case_runs_batch_state(state_data)
 
     def test_case_runs_batch_summary(self, application: Application, id: str) -> TestCaseRunsBatchSummary:
         summary_response = self.__call("GET", f"applications/{application.id}/test_case_runs_batches/{id}/summary")
-
-        summary_data = summary_response["data"]
-        return TestCaseRunsBatchSummary(
-            id=summary_data["id"],
-            name=summary_data["attributes"]["name"],
-            start_time=GatApi.__parse_time(summary_data["attributes"]["startTime"]),
-            finish_time=GatApi.__parse_time(summary_data["attributes"]["finishTime"]),
-            test_case_credits=summary_data["attributes"]["testCaseCredits"],
-            testers_involved=summary_data["attributes"]["testersInvolved"],
-            application_id=summary_data["relationships"]["application"]["data"]["id"],
-            environment_id=summary_data["relationships"]["environment"]["data"]["id"],
-            test_case_runs=[
-                TestCaseRunsBatchTestCaseRun(
-                    id=data["id"],
-                    name=data["attributes"]["name"],
-                    ada_url=data["attributes"]["adaUrl"],
-                    failed_results_count=data["attributes"]["failedResultsCount"],
-                    passed_results_count=data["attributes"]["passedResultsCount"],
-                    total_results_count=data["attributes"]["totalResultsCount"],
-                )
-                for data in summary_response["included"][0]["data"]
-            ],
-        )
+        return parsing.parse_test_case_runs_batch_summary(summary_response)
 
     def create_test_case_runs_batch(
         self,
@@ -267,92 +550,151 @@ class GatApi:
         internet_browsers: List[InternetBrowser],
         test_cases: List[TestCase],
     ) -> TestCaseRunsBatch:
-        data = {
-            "data": {
-                "type": "testCaseRunsBatch",
-                "attributes": {},
-                "relationships": {
-                    "applicationEnvironment": {"data": {"type": "applicationEnvironment", "id": environment.id}},
-                    "internetBrowsers": {
-                        "data": [{"type": "internetBrowser", "id": ib.id} for ib in internet_browsers]
-                    },
-                    "testCases": {"data": [{"type": "testCase", "id": tc.id} for tc in test_cases]},
-                },
-            }
-        }
         test_case_runs_batch_data = self.__call(
-            "POST", f"applications/{application.id}/test_case_runs_batches", json_data=data
+            "POST",
+            f"applications/{application.id}/test_case_runs_batches",
+            json_data=parsing.test_case_runs_batch_payload(environment, internet_browsers, test_cases),
         )["data"]
+        return parsing.parse_test_case_runs_batch(test_case_runs_batch_data)
 
-        return TestCaseRunsBatch(id=test_case_runs_batch_data["id"])
+    def iter_test_cases(self, application: Application, prefetch: bool = False) -> Iterator[TestCase]:
+        return (
+            parsing.parse_test_case(test_case)
+            for test_case in self.__paginate(f"applications/{application.id}/test_cases", prefetch)
+        )
 
     def test_cases(self, application: Application) -> List[TestCase]:
-        return [
-            # TODO: Populate importance and section when available
-            TestCase(
-                id=test_case["id"],
-                title=test_case["attributes"]["title"],
-                importance=None,
-                section=None,
-                instructions=[],
-            )
-            for test_case in self.__call("GET", f"applications/{application.id}/test_cases")["data"]
-        ]
+        return list(self.iter_test_cases(application))
 
     def delete_all_test_cases(self, application: Application):
         self.__call("DELETE", f"applications/{application.id}/test_cases/delete_all")
 
-    def delete_test_cases(self, application: Application, ids: List[str]):
-        self.__call("DELETE", f"applications/{application.id}/test_cases?ids={','.join(ids)}")
+    def delete_test_cases(self, application: Application, ids: List[str], max_workers: Optional[int] = None):
+        # IDs are split over calls with URLs of at most MAX_URL_LENGTH, made max_workers at once; all of them are made
+        # even if some fail, and GatBulkError tells which IDs were not deleted
+        suffix = f"applications/{application.id}/test_cases"
+        url_length = len(os.path.join(self.__configuration.uri, suffix))
 
-    def create_test_cases(self, application: Application, test_cases: List[TestCase]) -> List[TestCase]:
-        data = []
-        for test_case in test_cases:
-            data.append(
-                {
-                    "type": test_case.type,
-                    "attributes": {
-                        "title": test_case.title,
-                        "importance": test_case.importance,
-                        "section": test_case.section,
-                        "instructions": [
-                            {"type": i.type, "id": i.id}
-                            if i.type == "testCase"
-                            else {"type": i.type, "attributes": {"content": i.content, "assertion": i.assertion}}
-                            for i in test_case.instructions
-                        ],
-                    },
-                }
-            )
+        def delete(chunk: List[str]) -> Optional[GatError]:
+            try:
+                self.__call("DELETE", suffix + parsing.test_case_ids_query(chunk))
+            except GatError as error:
+                return error
+            return None
+
+        chunks = parsing.test_case_ids_chunks(ids, MAX_URL_LENGTH - url_length)
+        failures = [(chunk, error) for chunk, error in zip(chunks, self.map(delete, chunks, max_workers)) if error]
+        if failures:
+            raise bulk_delete_error("test cases", failures, len(ids))
 
+    def create_test_cases(self, application: Application, test_cases: List[TestCase]) -> List[TestCase]:
         return [
-            TestCase(
-                id=test_case["id"],
-                title=test_case["attributes"]["title"],
-                importance=test_case["attributes"]["importance"],
-                section=test_case["attributes"]["section"],
-                instructions=[
-                    TestCaseInstruction(
-                        id=i["id"], content=i["attributes"]["content"], assertion=i["attributes"]["assertion"]
-                    )
-                    for i in test_case["attributes"]["instructions"]
-                ],
-            )
+            parsing.parse_created_test_case(test_case)
             for test_case in self.__call(
-                "POST", f"applications/{application.id}/test_cases/import", json_data={"data": data}
+                "POST",
+                f"applications/{application.id}/test_cases/import",
+                json_data=parsing.test_cases_payload(test_cases),
             )["data"]
         ]
 
+    def import_test_cases(
+        self,
+        application: Application,
+        test_cases: Iterable[TestCase],
+        max_count: int = 100,
+        max_bytes: int = 1024 * 1024,
+        max_workers: Optional[int] = None,
+        checkpoint: Optional[GatImportCheckpoint] = None,
+    ) -> Iterator[GatImportChunk]:
+        import concurrent.futures
+
+        # Test cases are sent in chunks of at most max_count and about max_bytes, several at once; a failed chunk does
+        # not stop the others. Chunks are read from test_cases as earlier ones are sent, and yielded in order
+        def create(index: int, first: int, chunk: List[TestCase]) -> GatImportChunk:
+            try:
+                created_test_cases = self.create_test_cases(application, chunk)
+            except GatError as error:
+                return GatImportChunk(index, first, len(chunk), [], str(error))
+            if checkpoint:
+                checkpoint.complete(index, [test_case.id for test_case in created_test_cases])
+            return GatImportChunk(index, first, len(chunk), created_test_cases)
+
+        max_workers = max_workers or self.__configuration.pool_maxsize
+        pending: Deque[concurrent.futures.Future] = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gat") as executor:
+            first = 1
+            for index, chunk in enumerate(importer.iter_chunks(test_cases, max_count, max_bytes)):
+                if checkpoint and checkpoint.created(index) is not None:
+                    future: concurrent.futures.Future = concurrent.futures.Future()
+                    future.set_result(GatImportChunk(index, first, len(chunk), [], skipped=True))
+                else:
+                    # Run in a copy of the caller's context, so that deadlines apply to the workers as well
+                    future = executor.submit(contextvars.copy_context().run, create, index, first, chunk)
+                pending.append(future)
+                first += len(chunk)
+                # Bounds the chunks held in memory, while keeping every worker busy
+                while len(pending) > 2 * max_workers or pending and pending[0].done():
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def plan_sync_test_cases(self, application: Application, test_cases: Iterable[TestCase]) -> GatSyncPlan:
+        # Listed test cases are compared by content; attributes the listing leaves out are not guessed, they are not
+        # compared at all, for any test case
+        remote_test_cases: List[TestCase] = []
+        ignored: Set[str] = set()
+        for data in self.__paginate(f"applications/{application.id}/test_cases"):
+            ignored.update(parsing.missing_test_case_attributes(data))
+            remote_test_cases.append(parsing.parse_test_case(data))
+        if ignored:
+            self.__logger.info("Test cases were listed without %s, which are not compared", ", ".join(sorted(ignored)))
+        return sync.plan_sync(remote_test_cases, test_cases, ignored)
+
+    def sync_test_cases(
+        self,
+        application: Application,
+        plan: GatSyncPlan,
+        max_count: int = 100,
+        max_bytes: int = 1024 * 1024,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[GatImportChunk]:
+        # New versions are created before old ones are deleted, and old versions are kept when their new version was
+        # in a failed chunk, so a failed sync does not lose test cases; planning it again finishes it. Deletions happen
+        # once all chunks have been yielded
+        failed_keys = set()
+        for chunk in self.import_test_cases(application, plan.create, max_count, max_bytes, max_workers):
+            if chunk.error is not None:
+                start, end = chunk.first - 1, chunk.first - 1 + chunk.count
+                failed_keys.update(plan.key(test_case) for test_case in plan.create[start:end])
+            yield chunk
+        ids = [test_case.id for test_case in plan.delete if plan.key(test_case) not in failed_keys]
+        self.delete_test_cases(application, ids, max_workers)
+
+    def iter_countries(self, prefetch: bool = False) -> Iterator[Country]:
+        return (parsing.parse_country(country) for country in self.__paginate("countries", prefetch))
+
     def countries(self) -> List[Country]:
-        return [
-            Country(
-                id=country["id"],
-                name=country["attributes"]["name"],
-                code=country["attributes"]["code"],
-                available_platforms=country["attributes"]["availablePlatforms"],
+        return list(self.iter_countries())
+
+    def iter_test_case_runs(
+        self,
+        application: Application,
+        batch_id: str,
+        test_case_run_ids: Optional[List[str]],
+        outcome: Optional[str],
+        importance: Optional[str],
+        prefetch: bool = False,
+        stream: bool = False,
+    ) -> Iterator[TestCaseRun]:
+        return (
+            parsing.parse_test_case_run(test_case_run)
+            for test_case_run in self.__paginate(
+                f"applications/{application.id}/test_case_runs_batches/{batch_id}/test_case_runs"
+                f"{parsing.test_case_runs_query(test_case_run_ids, outcome, importance)}",
+                prefetch,
+                stream,
             )
-            for country in self.__call("GET", "countries")["data"]
-        ]
+        )
 
     def test_case_runs(
         self,
@@ -362,42 +704,4 @@ class GatApi:
         outcome: Optional[str],
         importance: Optional[str],
     ) -> List[TestCaseRun]:
-        filters = [
-            f"filter[{key}]={value}"
-            for key, value in {"ids": test_case_run_ids, "outcome": outcome, "importance": importance}.items()
-            if value
-        ]
-
-        result = self.__call(
-            "GET",
-            f"applications/{application.id}/test_case_runs_batches/{batch_id}/test_case_runs"
-            f"{('?' + '&'.join(filters)) if filters else ''}",
-        )
-
-        return [
-            TestCaseRun(
-                id=test_case_run["id"],
-                test_case_name=test_case_run["attributes"]["testCaseName"],
-                test_case_section=test_case_run["attributes"]["testCaseSection"],
-                test_case_importance=test_case_run["attributes"]["testCaseImportance"],
-                ada_url=test_case_run["attributes"]["adaUrl"],
-                variations=[
-                    TestCaseRun.Variation(
-                        name=variation["name"],
-                        results=[
-                            TestCaseRun.Variation.TestCaseRunResult(
-                                outcome=result["outcome"],
-                                attachment_url=result.get("attachmentUrl"),
-                                tester_comment=result["testerComment"],
-                                steps_to_reproduce=result["stepsToReproduce"],
-                                reported_at=GatApi.__parse_time(result["reportedAt"]),
-                                country=result["country"],
-                            )
-                            for result in variation["results"]
-                        ],
-                    )
-                    for variation in test_case_run["attributes"]["variations"]
-                ],
-            )
-            for test_case_run in result["data"]
-        ]
+        return list(self.iter_test_case_runs(application, batch_id, test_case_run_ids, outcome, importance))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import dataclasses
+import logging
+import threading
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclasses.dataclass(frozen=True)
+class GatCoalescingStats:
+    hits: int
+    misses: int
+    in_flight: int
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class GatRequestCoalescer:
+    def __init__(self):
+        self.__flights: Dict[Hashable, _Flight] = {}
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = threading.Lock()
+        self.__logger = logging.getLogger("gat.GatRequestCoalescer")
+
+    def stats(self) -> GatCoalescingStats:
+        with self.__lock:
+            return GatCoalescingStats(hits=self.__hits, misses=self.__misses, in_flight=len(self.__flights))
+
+    def run(self, key: Hashable, function: Callable[[], T], timeout: Optional[float] = None) -> T:
+        # The first caller runs the function, callers arriving with the same key before it finishes share its result
+        # or exception; TimeoutError means that the result has not arrived in time
+        with self.__lock:
+            flight = self.__flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.__flights[key] = _Flight()
+                self.__misses += 1
+            else:
+                self.__hits += 1
+
+        if not leader:
+            self.__logger.debug("Waiting for request in flight: %s", key)
+            if not flight.done.wait(None if timeout is None else max(timeout, 0.0)):
+                raise TimeoutError(f"Request in flight has not finished in {timeout:.1f} sec")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = function()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self.__lock:
+                del self.__flights[key]
+            flight.done.set()
+        return flight.result
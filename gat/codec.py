@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+import json
+from typing import Any
+
+
+class GatJsonCodec:
+    # Bodies are decoded straight from bytes, without decoding them to text first
+    name = "json"
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class GatOrjsonCodec(GatJsonCodec):
+    name = "orjson"
+
+    def __init__(self):
+        # orjson is an optional dependency, install with the "speedups" extra
+        import orjson
+
+        self.__orjson = orjson
+
+    def loads(self, data: bytes) -> Any:
+        # orjson.JSONDecodeError is a ValueError, like json.JSONDecodeError
+        return self.__orjson.loads(data)
+
+    def dumps(self, value: Any) -> bytes:
+        return self.__orjson.dumps(value)
+
+
+def default_codec() -> GatJsonCodec:
+    try:
+        return GatOrjsonCodec()
+    except ImportError:
+        return GatJsonCodec()
@@ -3,24 +3,135 @@
 import dataclasses
 import datetime
 import os
-from typing import List, Optional, Union
+import random
+import threading
+import time
+from typing import Any, Callable, FrozenSet, List, Mapping, Optional, TYPE_CHECKING, Union
 
-import requests
+from .cache import GatCache, GatHttpCache
+from .cassette import GatCassette
+from .codec import GatJsonCodec, default_codec
+from .coalescing import GatRequestCoalescer
+from .metrics import GatMetrics
+from .throttle import GatRateController
+from .transport import GatRequestsTransport, GatTransport, default_headers
+from .upload import GatUploadIndex
+
+if TYPE_CHECKING:
+    import requests
+
+
+@dataclasses.dataclass(frozen=True)
+class GatRetryPolicy:
+    max_attempts: int = 3
+    backoff_factor: float = 0.5
+    max_backoff: float = 30.0
+    jitter: bool = True
+    status_codes: FrozenSet[int] = frozenset([429, 500, 502, 503, 504])
+    idempotent_methods: FrozenSet[str] = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+    respect_retry_after: bool = True
+    max_retry_after: float = 120.0
+
+    def can_retry(self, method: str, status_code: Optional[int] = None, connect_error: bool = False) -> bool:
+        if method.upper() in self.idempotent_methods:
+            return status_code is None or status_code in self.status_codes
+        # Other methods are only retried when the server could not have acted on the request
+        return connect_error or status_code == 429
+
+    def backoff(self, retry: int) -> float:
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** (retry - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def retry_after(self, headers: Mapping[str, str]) -> Optional[float]:
+        value = headers.get("Retry-After") if self.respect_retry_after else None
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            import email.utils
+
+            try:
+                delay = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(max(delay, 0.0), self.max_retry_after)
 
 
 @dataclasses.dataclass(frozen=True)
 class GatApiConfiguration:
     key: str
     root: str = "https://app.globalapptesting.com/api/"
-    session: requests.Session = dataclasses.field(init=False, default_factory=requests.Session)
+    cache: Optional[GatCache] = None
+    http_cache: Optional[GatHttpCache] = dataclasses.field(default_factory=GatHttpCache)
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    pool_block: bool = False
+    keep_alive: bool = True
+    connect_timeout: Optional[float] = 10.0
+    read_timeout: Optional[float] = 60.0
+    retry: GatRetryPolicy = dataclasses.field(default_factory=GatRetryPolicy)
+    # Unless throttle is False, a rate controller allowing pool_maxsize calls in flight at first is created when none
+    # is given
+    rate_controller: Optional[GatRateController] = None
+    throttle: bool = True
+    coalescer: Optional[GatRequestCoalescer] = dataclasses.field(default_factory=GatRequestCoalescer)
+    metrics: Optional[GatMetrics] = None
+    prewarm: bool = False
+    cassette: Optional[GatCassette] = None
+    upload_index: Optional[GatUploadIndex] = None
+    codec: GatJsonCodec = dataclasses.field(default_factory=default_codec)
+    transport_factory: Callable[["GatApiConfiguration"], GatTransport] = GatRequestsTransport
     version: str = dataclasses.field(default="v1", init=False)
 
     @property
     def uri(self) -> str:
         return os.path.join(self.root, self.version)
 
+    @property
+    def session(self) -> "requests.Session":
+        # requests takes a large part of the start-up time, so it is only imported when the first call is made
+        if self.__session is None:
+            with self.__session_lock:
+                if self.__session is None:
+                    object.__setattr__(self, "_GatApiConfiguration__session", self.__create_session())
+        return self.__session
+
+    @property
+    def transport(self) -> GatTransport:
+        # Shared by all GatApi instances using the configuration, like the session
+        if self.__transport is None:
+            with self.__transport_lock:
+                if self.__transport is None:
+                    transport = self.transport_factory(self)
+                    if self.cassette is not None:
+                        transport = self.cassette.wrap(transport)
+                    object.__setattr__(self, "_GatApiConfiguration__transport", transport)
+        return self.__transport
+
     def __post_init__(self):
-        self.session.headers.update({"User-Agent": "gat.py", "X-Api-Key": self.key})
+        object.__setattr__(self, "_GatApiConfiguration__session", None)
+        object.__setattr__(self, "_GatApiConfiguration__session_lock", threading.Lock())
+        object.__setattr__(self, "_GatApiConfiguration__transport", None)
+        object.__setattr__(self, "_GatApiConfiguration__transport_lock", threading.Lock())
+        if self.throttle and self.rate_controller is None:
+            object.__setattr__(self, "rate_controller", GatRateController(initial_concurrency=self.pool_maxsize))
+        elif not self.throttle:
+            object.__setattr__(self, "rate_controller", None)
+
+    def __create_session(self) -> "requests.Session":
+        import requests
+
+        # The session is only configured here; connection pools of the adapter are thread-safe, so the session can be
+        # shared by all threads using the same GatApi
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize, pool_block=self.pool_block
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(default_headers(self))
+        return session
 
 
 @dataclasses.dataclass(frozen=True)
@@ -32,10 +143,39 @@ class Organization:
 
 @dataclasses.dataclass(frozen=True)
 class Application:
+    # Identified by type and ID, like LazyApplication, so that loaded and lazy references to the same application are
+    # equal and have the same hash
     type: str = dataclasses.field(init=False, default="application")
     id: str
-    name: str
-    platform_name: str
+    name: str = dataclasses.field(compare=False)
+    platform_name: str = dataclasses.field(compare=False)
+
+
+class LazyApplication(Application):
+    def __init__(self, id: str, loader: Callable[[], Application]):
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "_LazyApplication__loader", loader)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes missing from the instance, i.e. before the application has been loaded
+        if name not in ("name", "platform_name"):
+            raise AttributeError(name)
+        application = self.__loader()
+        object.__setattr__(self, "name", application.name)
+        object.__setattr__(self, "platform_name", application.platform_name)
+        return getattr(application, name)
+
+    # Same comparison and hash as Application, neither loads the application
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Application):
+            return NotImplemented
+        return (self.type, self.id) == (other.type, other.id)
+
+    def __hash__(self) -> int:
+        return hash((self.type, self.id))
+
+    def __repr__(self) -> str:
+        return f"LazyApplication(id={self.id!r})"
 
 
 @dataclasses.dataclass(frozen=True)
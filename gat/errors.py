@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+
+from typing import List
+
+
+class GatError(BaseException):
+    pass
+
+
+class GatBulkError(GatError):
+    # Raised once all the calls of a bulk operation have been made, when some of them failed
+    def __init__(self, message: str, failed_ids: List[str], errors: List[GatError]):
+        super().__init__(message)
+        self.failed_ids = failed_ids
+        self.errors = errors
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+import codecs
+import csv
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from . import parsing, streaming
+from .data import EmbeddedTestCase, TestCase, TestCaseInstruction
+from .errors import GatError
+from .upload import file_digest
+
+FORMATS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv", ".yaml": "yaml", ".yml": "yaml"}
+IMPORTANCES = {importance.lower(): importance for importance in ["Low", "Medium", "Critical"]}
+
+# Size of {"data": []} around the test cases of a request
+PAYLOAD_ENVELOPE_SIZE = 12
+
+
+@dataclasses.dataclass(frozen=True)
+class GatImportChunk:
+    index: int
+    # Position of the first test case of the chunk in the source, counted from 1
+    first: int
+    count: int
+    # Test cases created from the chunk, empty when it failed or was created by an earlier import
+    test_cases: List[TestCase]
+    error: Optional[str] = None
+    skipped: bool = False
+
+
+def source_format(path: str) -> Optional[str]:
+    return FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def instruction_from_text(text: str) -> Union[TestCaseInstruction, EmbeddedTestCase]:
+    # Same rules as the create-test-case command: "embedded_id=ID" embeds a test case, a question is an assertion
+    if text.startswith("embedded_id="):
+        return EmbeddedTestCase(id=text.replace("embedded_id=", ""))
+    return TestCaseInstruction(id="new", content=text, assertion=text.endswith("?"))
+
+
+def parse_test_case_definition(record: Any) -> TestCase:
+    # Either plain attributes or an item of the import payload, as written by parsing.test_cases_payload
+    if not isinstance(record, dict):
+        raise ValueError("a test case has to be an object")
+    attributes = record.get("attributes", record)
+    title = attributes.get("title")
+    if not title or not isinstance(title, str):
+        raise ValueError("title is missing")
+    importance = str(attributes.get("importance") or "Medium")
+    if importance.lower() not in IMPORTANCES:
+        raise ValueError(f"unknown importance {importance}, use one of {', '.join(IMPORTANCES.values())}")
+    return TestCase(
+        id="new",
+        title=title,
+        importance=IMPORTANCES[importance.lower()],
+        section=attributes.get("section") or None,
+        instructions=[parse_instruction_definition(record) for record in attributes.get("instructions") or []],
+    )
+
+
+def parse_instruction_definition(record: Any) -> Union[TestCaseInstruction, EmbeddedTestCase]:
+    if isinstance(record, str):
+        return instruction_from_text(record)
+    if not isinstance(record, dict):
+        raise ValueError("an instruction has to be a text or an object")
+    if "embedded_id" in record:
+        return EmbeddedTestCase(id=str(record["embedded_id"]))
+    if record.get("type") == "testCase":
+        return EmbeddedTestCase(id=str(record["id"]))
+    attributes = record.get("attributes", record)
+    content = attributes.get("content")
+    if not isinstance(content, str):
+        raise ValueError("instruction content is missing")
+    assertion = attributes.get("assertion")
+    return TestCaseInstruction(
+        id="new", content=content, assertion=content.endswith("?") if assertion is None else bool(assertion)
+    )
+
+
+def iter_test_case_definitions(source: IO[bytes], data_format: str, name: str) -> Iterator[TestCase]:
+    # Test cases are read one at a time, so that large files are not loaded in memory at once
+    records = _READERS[data_format](source)
+    location = None
+    while True:
+        try:
+            location, record = next(records)
+        except StopIteration:
+            return
+        except (ValueError, csv.Error) as error:
+            position = f" after {location}" if location else ""
+            raise GatError(f"Unable to read {name}{position}: {error}") from error
+        try:
+            yield parse_test_case_definition(record)
+        except ValueError as error:
+            raise GatError(f"Invalid test case in {name}, {location}: {error}") from error
+
+
+def _iter_json(source: IO[bytes]) -> Iterator[Tuple[str, Any]]:
+    # Either an array of test cases or an object with them under "data", like the import payload
+    chunks = iter(lambda: source.read(65536), b"")
+    for number, record in enumerate(streaming.iter_items(chunks), start=1):
+        yield f"item {number}", record
+
+
+def _iter_ndjson(source: IO[bytes]) -> Iterator[Tuple[str, Any]]:
+    for number, line in enumerate(source, start=1):
+        if line.strip():
+            yield f"line {number}", json.loads(line)
+
+
+def _iter_csv(source: IO[bytes]) -> Iterator[Tuple[str, Any]]:
+    # One test case per row with title, importance, section and instructions columns, one instruction per line
+    reader = csv.DictReader(codecs.getreader("utf-8-sig")(source))
+    for row in reader:
+        record = {(key or "").strip().lower(): value for key, value in row.items()}
+        instructions = (record.get("instructions") or "").splitlines()
+        record["instructions"] = [instruction.strip() for instruction in instructions if instruction.strip()]
+        yield f"line {reader.line_num}", record
+
+
+def _iter_yaml(source: IO[bytes]) -> Iterator[Tuple[str, Any]]:
+    # PyYAML is an optional dependency, install with the "yaml" extra; each document is either a list of test cases
+    # or a single one, and is loaded in full
+    import yaml
+
+    number = 0
+    try:
+        for document in yaml.safe_load_all(source):
+            for record in document if isinstance(document, list) else [] if document is None else [document]:
+                number += 1
+                yield f"item {number}", record
+    except yaml.YAMLError as error:
+        raise ValueError(str(error)) from error
+
+
+_READERS = {"json": _iter_json, "ndjson": _iter_ndjson, "csv": _iter_csv, "yaml": _iter_yaml}
+
+
+def iter_chunks(test_cases: Iterable[TestCase], max_count: int, max_bytes: int) -> Iterator[List[TestCase]]:
+    # A test case larger than max_bytes is sent alone
+    chunk: List[TestCase] = []
+    size = PAYLOAD_ENVELOPE_SIZE
+    for test_case in test_cases:
+        test_case_size = len(json.dumps(parsing.test_cases_payload([test_case])["data"][0]).encode("utf-8")) + 2
+        if chunk and (len(chunk) >= max_count or size + test_case_size > max_bytes):
+            yield chunk
+            chunk, size = [], PAYLOAD_ENVELOPE_SIZE
+        chunk.append(test_case)
+        size += test_case_size
+    if chunk:
+        yield chunk
+
+
+def import_fingerprint(path: str, max_count: int, max_bytes: int) -> str:
+    # Chunks only match those of an earlier import of the same content with the same limits
+    return hashlib.sha256(f"{file_digest(path)}\0{max_count}\0{max_bytes}".encode("utf-8")).hexdigest()
+
+
+class GatImportCheckpoint:
+    # Remembers the chunks of an import that have been created, with the IDs of their test cases, so that a failed or
+    # interrupted import can be run again without creating test cases twice
+    def __init__(self, path: str, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.__lock = threading.Lock()
+        state = self.__load()
+        if state and state.get("fingerprint") != fingerprint:
+            raise GatError(f"Checkpoint {path} was written by an import of another file or with other chunk limits")
+        self.__chunks: Dict[str, List[str]] = state.get("chunks", {}) if state else {}
+        # Written up front, so that an unusable path fails before any test case is created
+        self.__store()
+
+    def created(self, index: int) -> Optional[List[str]]:
+        with self.__lock:
+            return self.__chunks.get(str(index))
+
+    def complete(self, index: int, test_case_ids: List[str]):
+        with self.__lock:
+            self.__chunks[str(index)] = test_case_ids
+            self.__store()
+
+    def __load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as checkpoint_file:
+                state = json.load(checkpoint_file)
+        except FileNotFoundError:
+            return None
+        except ValueError as error:
+            raise GatError(
+                f"Checkpoint {self.path} is not readable, remove it to start the import over: {error}"
+            ) from error
+        if not isinstance(state, dict) or not isinstance(state.get("chunks", {}), dict):
+            raise GatError(f"Checkpoint {self.path} is not readable, remove it to start the import over")
+        return state
+
+    def __store(self):
+        import tempfile
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(handle, "w", encoding="utf-8") as checkpoint_file:
+            json.dump({"fingerprint": self.fingerprint, "chunks": self.__chunks}, checkpoint_file)
+        os.replace(temporary_path, self.path)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import dataclasses
+import json
+import math
+import os
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional
+
+
+@dataclasses.dataclass(frozen=True)
+class GatEndpointStats:
+    endpoint: str
+    count: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    bytes: int
+    retries: int
+    network_time: float
+    parse_time: float
+
+
+@dataclasses.dataclass
+class _Endpoint:
+    latencies: List[float] = dataclasses.field(default_factory=list)
+    errors: int = 0
+    bytes: int = 0
+    retries: int = 0
+    network_time: float = 0.0
+    parse_time: float = 0.0
+
+
+# IDs are opaque strings, so they are recognized by their position: the segment following a collection is an ID,
+# unless it is one of the actions on the collection
+COLLECTIONS = frozenset(
+    [
+        "applications",
+        "countries",
+        "environments",
+        "internet_browsers",
+        "mobile_devices",
+        "native_application_builds",
+        "test_case_runs",
+        "test_case_runs_batches",
+        "test_cases",
+    ]
+)
+ACTIONS = frozenset(["delete_all", "import", "state", "summary"])
+
+
+def endpoint_name(method: str, path: str) -> str:
+    # e.g. applications/{id}/test_case_runs_batches/{id}/summary
+    segments = urllib.parse.urlsplit(path).path.strip("/").split("/")
+    names = [
+        "{id}" if index and segments[index - 1] in COLLECTIONS and segment not in ACTIONS else segment
+        for index, segment in enumerate(segments)
+    ]
+    return " ".join([method, "/".join(names)])
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class GatMetrics:
+    def __init__(self, max_events: int = 100000):
+        self.max_events = max_events
+        self.__endpoints: Dict[str, _Endpoint] = {}
+        self.__events: List[Dict[str, Any]] = []
+        self.__started_at = time.perf_counter()
+        self.__lock = threading.Lock()
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        started_at: float,
+        network_time: float,
+        parse_time: float = 0.0,
+        size: int = 0,
+        retries: int = 0,
+        status_code: Optional[int] = None,
+    ):
+        # Times come from time.perf_counter(), path is relative to the API root
+        name = endpoint_name(method, path)
+        event = {
+            "name": name,
+            "cat": "http",
+            "ph": "X",
+            "ts": (started_at - self.__started_at) * 1e6,
+            "dur": (network_time + parse_time) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"path": path, "status": status_code, "retries": retries, "bytes": size},
+        }
+        with self.__lock:
+            endpoint = self.__endpoints.setdefault(name, _Endpoint())
+            endpoint.latencies.append(network_time + parse_time)
+            if status_code is None or status_code >= 400:
+                endpoint.errors += 1
+            endpoint.bytes += size
+            endpoint.retries += retries
+            endpoint.network_time += network_time
+            endpoint.parse_time += parse_time
+            if len(self.__events) < self.max_events:
+                self.__events.append(event)
+                if parse_time:
+                    parse_start = event["ts"] + network_time * 1e6
+                    self.__events.append(dict(event, name="parse", cat="parse", ts=parse_start, dur=parse_time * 1e6))
+
+    def summary(self) -> List[GatEndpointStats]:
+        with self.__lock:
+            return [
+                GatEndpointStats(
+                    endpoint=name,
+                    count=len(endpoint.latencies),
+                    errors=endpoint.errors,
+                    p50=percentile(endpoint.latencies, 0.50),
+                    p95=percentile(endpoint.latencies, 0.95),
+                    p99=percentile(endpoint.latencies, 0.99),
+                    bytes=endpoint.bytes,
+                    retries=endpoint.retries,
+                    network_time=endpoint.network_time,
+                    parse_time=endpoint.parse_time,
+                )
+                for name, endpoint in sorted(self.__endpoints.items())
+            ]
+
+    def write_trace(self, path: str):
+        # Chrome trace event format, can be opened in chrome://tracing or https://ui.perfetto.dev
+        with self.__lock:
+            events = list(self.__events)
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from .data import (
+    Application,
+    Country,
+    EmbeddedTestCase,
+    Environment,
+    InternetBrowser,
+    MobileDevice,
+    NativeBuild,
+    Organization,
+    TestCase,
+    TestCaseInstruction,
+    TestCaseRun,
+    TestCaseRunsBatch,
+    TestCaseRunsBatchState,
+    TestCaseRunsBatchSummary,
+    TestCaseRunsBatchTestCaseRun,
+)
+
+
+def parse_time(string_time: Optional[str]) -> Optional[datetime.datetime]:
+    return datetime.datetime.fromisoformat(string_time.replace("Z", "+00:00")) if string_time else None
+
+
+def parse_error(status_code: int, json_response: Any) -> str:
+    if 400 <= status_code < 500 and isinstance(json_response, dict) and "errors" in json_response:
+        first_error = json_response["errors"][0]
+        error_message = first_error["title"]
+        if "detail" in first_error:
+            error_message = f"{error_message} - {first_error['detail']}"
+        return f"Call failed: {status_code}: {error_message}"
+    return f"Call failed: {status_code}"
+
+
+def parse_organization(data: Dict[str, Any]) -> Organization:
+    return Organization(id=data["id"], name=data["attributes"]["name"])
+
+
+def parse_application(data: Dict[str, Any]) -> Application:
+    return Application(id=data["id"], name=data["attributes"]["name"], platform_name=data["attributes"]["platformName"])
+
+
+def parse_environment(data: Dict[str, Any]) -> Environment:
+    return Environment(id=data["id"], name=data["attributes"]["name"], url=data["attributes"]["url"])
+
+
+def environment_payload(name: str, url: str) -> Dict[str, Any]:
+    return {"data": {"type": "applicationEnvironment", "attributes": {"name": name, "url": url}}}
+
+
+def parse_native_build(data: Dict[str, Any]) -> NativeBuild:
+    return NativeBuild(
+        id=data["id"],
+        name=data["attributes"]["name"],
+        original_file_name=data["attributes"].get("appFileOriginalFilename"),
+        external_vendor_url=data["attributes"].get("externalVendorUrl"),
+        signing_status=data["attributes"]["signingStatus"],
+    )
+
+
+def native_build_payload(name: str) -> Dict[str, Any]:
+    return {"data": {"type": "nativeApplicationBuild", "attributes": {"name": name}}}
+
+
+def native_build_form(name: str, external_vendor_url: Optional[str]) -> Dict[str, Any]:
+    return {
+        "data[type]": "nativeApplicationBuild",
+        "data[attributes][name]": name,
+        "data[attributes][external_vendor_url]": external_vendor_url,
+    }
+
+
+def parse_internet_browser(data: Dict[str, Any]) -> InternetBrowser:
+    return InternetBrowser(
+        id=data["id"], name=data["attributes"]["name"], operating_system_name=data["attributes"]["operatingSystemName"],
+    )
+
+
+def parse_mobile_device(data: Dict[str, Any]) -> MobileDevice:
+    return MobileDevice(id=data["id"], name=data["attributes"]["name"], brand_name=data["attributes"]["brandName"])
+
+
+def parse_country(data: Dict[str, Any]) -> Country:
+    return Country(
+        id=data["id"],
+        name=data["attributes"]["name"],
+        code=data["attributes"]["code"],
+        available_platforms=data["attributes"]["availablePlatforms"],
+    )
+
+
+def parse_test_case_runs_batch_state(data: Dict[str, Any]) -> TestCaseRunsBatchState:
+    return TestCaseRunsBatchState(
+        id=data["id"],
+        state=data["attributes"]["state"],
+        total_count=data["attributes"]["totalCount"],
+        in_progress_count=data["attributes"]["inProgressCount"],
+        completed_count=data["attributes"]["completedCount"],
+        failed_count=data["attributes"]["failedCount"],
+        passed_count=data["attributes"]["passedCount"],
+        cancelled_count=data["attributes"]["cancelledCount"],
+    )
+
+
+def parse_test_case_runs_batch_summary(summary_response: Dict[str, Any]) -> TestCaseRunsBatchSummary:
+    summary_data = summary_response["data"]
+    return TestCaseRunsBatchSummary(
+        id=summary_data["id"],
+        name=summary_data["attributes"]["name"],
+        start_time=parse_time(summary_data["attributes"]["startTime"]),
+        finish_time=parse_time(summary_data["attributes"]["finishTime"]),
+        test_case_credits=summary_data["attributes"]["testCaseCredits"],
+        testers_involved=summary_data["attributes"]["testersInvolved"],
+        application_id=summary_data["relationships"]["application"]["data"]["id"],
+        environment_id=summary_data["relationships"]["environment"]["data"]["id"],
+        test_case_runs=[
+            TestCaseRunsBatchTestCaseRun(
+                id=data["id"],
+                name=data["attributes"]["name"],
+                ada_url=data["attributes"]["adaUrl"],
+                failed_results_count=data["attributes"]["failedResultsCount"],
+                passed_results_count=data["attributes"]["passedResultsCount"],
+                total_results_count=data["attributes"]["totalResultsCount"],
+            )
+            for data in summary_response["included"][0]["data"]
+        ],
+    )
+
+
+def test_case_runs_batch_payload(
+    environment: Environment, internet_browsers: List[InternetBrowser], test_cases: List[TestCase]
+) -> Dict[str, Any]:
+    return {
+        "data": {
+            "type": "testCaseRunsBatch",
+            "attributes": {},
+            "relationships": {
+                "applicationEnvironment": {"data": {"type": "applicationEnvironment", "id": environment.id}},
+                "internetBrowsers": {"data": [{"type": "internetBrowser", "id": ib.id} for ib in internet_browsers]},
+                "testCases": {"data": [{"type": "testCase", "id": tc.id} for tc in test_cases]},
+            },
+        }
+    }
+
+
+def parse_test_case_runs_batch(data: Dict[str, Any]) -> TestCaseRunsBatch:
+    return TestCaseRunsBatch(id=data["id"])
+
+
+def missing_test_case_attributes(data: Dict[str, Any]) -> List[str]:
+    # A section may be null, but importance and instructions are known for every test case
+    attributes = data["attributes"]
+    missing = [] if attributes.get("importance") else ["importance"]
+    missing.extend(name for name in ["section", "instructions"] if name not in attributes)
+    return missing
+
+
+def parse_test_case(data: Dict[str, Any]) -> TestCase:
+    # Attributes missing from a listing are left empty
+    attributes = data["attributes"]
+    return TestCase(
+        id=data["id"],
+        title=attributes["title"],
+        importance=attributes.get("importance"),
+        section=attributes.get("section"),
+        instructions=[parse_test_case_instruction(i) for i in attributes.get("instructions") or []],
+    )
+
+
+def parse_created_test_case(data: Dict[str, Any]) -> TestCase:
+    return TestCase(
+        id=data["id"],
+        title=data["attributes"]["title"],
+        importance=data["attributes"]["importance"],
+        section=data["attributes"]["section"],
+        instructions=[parse_test_case_instruction(i) for i in data["attributes"]["instructions"]],
+    )
+
+
+def parse_test_case_instruction(data: Dict[str, Any]) -> Union[TestCaseInstruction, EmbeddedTestCase]:
+    if data["type"] == "testCase":
+        return EmbeddedTestCase(id=data["id"])
+    return TestCaseInstruction(
+        id=data["id"], content=data["attributes"]["content"], assertion=data["attributes"]["assertion"]
+    )
+
+
+def test_cases_payload(test_cases: List[TestCase]) -> Dict[str, Any]:
+    return {
+        "data": [
+            {
+                "type": test_case.type,
+                "attributes": {
+                    "title": test_case.title,
+                    "importance": test_case.importance,
+                    "section": test_case.section,
+                    "instructions": [
+                        {"type": i.type, "id": i.id}
+                        if i.type == "testCase"
+                        else {"type": i.type, "attributes": {"content": i.content, "assertion": i.assertion}}
+                        for i in test_case.instructions
+                    ],
+                },
+            }
+            for test_case in test_cases
+        ]
+    }
+
+
+def test_case_ids_query(ids: List[str]) -> str:
+    return f"?ids={','.join(ids)}"
+
+
+def test_case_ids_chunks(ids: List[str], max_length: int) -> List[List[str]]:
+    # Consecutive IDs whose query is at most max_length long, an ID too long for that is sent alone
+    chunks: List[List[str]] = []
+    length = max_length
+    for id in ids:
+        if length + 1 + len(id) > max_length:
+            chunks.append([])
+            length = len(test_case_ids_query([]))
+        length += len(id) + (1 if chunks[-1] else 0)
+        chunks[-1].append(id)
+    return chunks
+
+
+def test_case_runs_query(
+    test_case_run_ids: Optional[List[str]], outcome: Optional[str], importance: Optional[str]
+) -> str:
+    filters = [
+        f"filter[{key}]={value}"
+        for key, value in {"ids": test_case_run_ids, "outcome": outcome, "importance": importance}.items()
+        if value
+    ]
+    return ("?" + "&".join(filters)) if filters else ""
+
+
+def parse_test_case_run(data: Dict[str, Any]) -> TestCaseRun:
+    return TestCaseRun(
+        id=data["id"],
+        test_case_name=data["attributes"]["testCaseName"],
+        test_case_section=data["attributes"]["testCaseSection"],
+        test_case_importance=data["attributes"]["testCaseImportance"],
+        ada_url=data["attributes"]["adaUrl"],
+        variations=[
+            TestCaseRun.Variation(
+                name=variation["name"],
+                results=[
+                    TestCaseRun.Variation.TestCaseRunResult(
+                        outcome=result["outcome"],
+                        attachment_url=result.get("attachmentUrl"),
+                        tester_comment=result["testerComment"],
+                        steps_to_reproduce=result["stepsToReproduce"],
+                        reported_at=parse_time(result["reportedAt"]),
+                        country=result["country"],
+                    )
+                    for result in variation["results"]
+                ],
+            )
+            for variation in data["attributes"]["variations"]
+        ],
+    )
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import codecs
+import json
+from typing import Any, Dict, Generator, Iterable, Iterator, Optional
+
+
+class _Reader:
+    def __init__(self, chunks: Iterable[bytes]):
+        self.__chunks = iter(chunks)
+        self.__decoder = codecs.getincrementaldecoder("utf-8")()
+        self.__json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.finished = False
+
+    def read_more(self, minimum: int = 1) -> bool:
+        # Drop the consumed part of the buffer, so that memory is bounded by the largest single value
+        position = self.position
+        if position > 65536:
+            self.buffer = self.buffer[position:]
+            self.position = 0
+        initial_length = len(self.buffer)
+        while len(self.buffer) < initial_length + minimum and not self.finished:
+            try:
+                self.buffer += self.__decoder.decode(next(self.__chunks))
+            except StopIteration:
+                self.buffer += self.__decoder.decode(b"", final=True)
+                self.finished = True
+        return len(self.buffer) > initial_length
+
+    def peek(self) -> str:
+        while self.position < len(self.buffer) or self.read_more():
+            if not self.buffer[self.position].isspace():
+                return self.buffer[self.position]
+            self.position += 1
+        raise ValueError("Unexpected end of JSON data")
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if character not in characters:
+            raise ValueError(f"Expected one of {characters!r} at {self.position}, got {character!r}")
+        self.position += 1
+        return character
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.__json_decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.finished:
+                    raise
+                # Grow the buffer geometrically, so that large values are not re-parsed for every chunk
+                self.read_more(max(len(self.buffer) - self.position, 1))
+                continue
+            # A number is only complete when followed by a delimiter, otherwise it might continue in the next chunk
+            if isinstance(value, (int, float)) and not self.finished:
+                if end >= len(self.buffer) or self.buffer[end] not in ",]} \t\r\n":
+                    self.read_more()
+                    continue
+            self.position = end
+            return value
+
+
+def iter_array_items(
+    chunks: Iterable[bytes], key: str = "data", members: Optional[Dict[str, Any]] = None
+) -> Iterator[Any]:
+    # Elements of the array stored under the key of the top-level object are yielded as soon as each of them is
+    # complete, the remaining members of the object are stored in members
+    return _iter_member_items(_Reader(chunks), key, {} if members is None else members)
+
+
+def iter_items(chunks: Iterable[bytes], key: str = "data") -> Iterator[Any]:
+    # Like iter_array_items, but the top-level value can also be the array itself, and an object without the array
+    # is an error
+    reader = _Reader(chunks)
+    character = reader.peek()
+    if character == "[":
+        yield from _iter_items(reader)
+    elif character != "{" or not (yield from _iter_member_items(reader, key, {})):
+        raise ValueError(f"Expected an array or an object with an array under {key!r}")
+
+
+def _iter_member_items(reader: _Reader, key: str, members: Dict[str, Any]) -> Generator[Any, None, bool]:
+    # Returns whether the object had an array under the key
+    found = False
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+        return found
+    while True:
+        member_key = reader.value()
+        reader.expect(":")
+        if member_key == key and reader.peek() == "[":
+            found = True
+            yield from _iter_items(reader)
+        else:
+            members[member_key] = reader.value()
+        if reader.expect(",}") == "}":
+            return found
+
+
+def _iter_items(reader: _Reader) -> Iterator[Any]:
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.expect("]")
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(",]") == "]":
+            return
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import collections
+import dataclasses
+import hashlib
+import json
+from typing import Any, Collection, Dict, Iterable, List, Tuple
+
+from .data import TestCase
+from .errors import GatError
+
+# Test cases are matched by section and title, there is no way to update one in place
+SyncKey = Tuple[str, str]
+# Attributes compared besides the title, a listing may leave them out
+COMPARED_ATTRIBUTES = ("importance", "section", "instructions")
+
+
+@dataclasses.dataclass(frozen=True)
+class GatSyncPlan:
+    # Test cases to create, new ones and new versions of changed ones, in the order of the source
+    create: List[TestCase]
+    # Remote test cases to delete, removed ones and old versions of changed ones
+    delete: List[TestCase]
+    unchanged: List[TestCase]
+    # Attributes left out of the listing, which were not compared
+    ignored: Tuple[str, ...] = ()
+
+    def key(self, test_case: TestCase) -> SyncKey:
+        return sync_key(test_case, "section" not in self.ignored)
+
+    @property
+    def replaced_keys(self) -> List[SyncKey]:
+        deleted_keys = {self.key(test_case) for test_case in self.delete}
+        return [self.key(test_case) for test_case in self.create if self.key(test_case) in deleted_keys]
+
+
+def sync_key(test_case: TestCase, by_section: bool = True) -> SyncKey:
+    return test_case.section or "" if by_section else "", test_case.title
+
+
+def content_digest(test_case: TestCase, ignored: Collection[str] = ()) -> str:
+    # IDs are left out, except those of embedded test cases; importance defaults to Medium like in imports
+    instructions: List[Any] = [
+        ["testCase", instruction.id] if instruction.type == "testCase" else [instruction.content, instruction.assertion]
+        for instruction in test_case.instructions
+    ]
+    attributes = {
+        "importance": test_case.importance or "Medium",
+        "section": test_case.section or "",
+        "instructions": instructions,
+    }
+    content = [test_case.title] + [attributes[name] for name in COMPARED_ATTRIBUTES if name not in ignored]
+    return hashlib.sha256(json.dumps(content, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def plan_sync(
+    remote_test_cases: Iterable[TestCase], local_test_cases: Iterable[TestCase], ignored: Collection[str] = ()
+) -> GatSyncPlan:
+    by_section = "section" not in ignored
+    local: Dict[SyncKey, TestCase] = {}
+    for test_case in local_test_cases:
+        key = sync_key(test_case, by_section)
+        if key in local:
+            if not by_section:
+                raise GatError(
+                    f"Test case {key[1]} is defined more than once, sections cannot tell them apart since the listing "
+                    f"does not include them"
+                )
+            section = f" in section {key[0]}" if key[0] else ""
+            raise GatError(f"Test case {key[1]}{section} is defined more than once")
+        local[key] = test_case
+
+    # Remote duplicates are kept only once, the one matching the local test case if any
+    remote: Dict[SyncKey, List[TestCase]] = collections.defaultdict(list)
+    for test_case in remote_test_cases:
+        remote[sync_key(test_case, by_section)].append(test_case)
+
+    create, delete, unchanged = [], [], []
+    for key, test_case in local.items():
+        digest = content_digest(test_case, ignored)
+        matching = next(
+            (candidate for candidate in remote.get(key, []) if content_digest(candidate, ignored) == digest), None
+        )
+        if matching is None:
+            create.append(test_case)
+        else:
+            unchanged.append(matching)
+    kept_ids = {test_case.id for test_case in unchanged}
+    for test_cases in remote.values():
+        delete.extend(test_case for test_case in test_cases if test_case.id not in kept_ids)
+    ignored = tuple(name for name in COMPARED_ATTRIBUTES if name in ignored)
+    return GatSyncPlan(create=create, delete=delete, unchanged=unchanged, ignored=ignored)
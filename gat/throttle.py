@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import collections
+import dataclasses
+import logging
+import threading
+import time
+from typing import Deque, Optional
+
+
+@dataclasses.dataclass(frozen=True)
+class GatRateLimits:
+    concurrency: int
+    # None while calls per second are not limited
+    rate: Optional[float]
+    in_flight: int
+    decreases: int = 0
+
+
+class GatRateController:
+    # Calls per second are only limited once the API has pushed back, starting from half the rate observed then; the
+    # limit is lifted again when it grows past max_rate
+    def __init__(
+        self,
+        initial_rate: Optional[float] = None,
+        min_rate: float = 0.5,
+        max_rate: float = 100.0,
+        initial_concurrency: int = 10,
+        min_concurrency: int = 1,
+        max_concurrency: int = 64,
+        additive_increase: float = 1.0,
+        multiplicative_decrease: float = 0.5,
+        target_latency: float = 2.0,
+        cooldown: float = 1.0,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.__rate = initial_rate
+        self.__concurrency = float(initial_concurrency)
+        self.__tokens = max(1.0, initial_rate or 1.0)
+        self.__in_flight = 0
+        self.__refilled_at = time.monotonic()
+        self.__decreased_at = float("-inf")
+        self.__decreases = 0
+        # Times at which calls were sent during the last second
+        self.__sent_at: Deque[float] = collections.deque()
+        self.__condition = threading.Condition()
+        self.__logger = logging.getLogger("gat.GatRateController")
+
+    def limits(self) -> GatRateLimits:
+        with self.__condition:
+            return GatRateLimits(
+                concurrency=int(self.__concurrency),
+                rate=self.__rate,
+                in_flight=self.__in_flight,
+                decreases=self.__decreases,
+            )
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        with self.__condition:
+            while True:
+                now = self.__refill()
+                if self.__in_flight < int(self.__concurrency) and (self.__rate is None or self.__tokens >= 1.0):
+                    if self.__rate is not None:
+                        self.__tokens -= 1.0
+                    self.__in_flight += 1
+                    self.__sent_at.append(now)
+                    while self.__sent_at[0] < now - 1.0:
+                        self.__sent_at.popleft()
+                    return True
+                # Wake up when the next token is due; releases notify waiters about free concurrency slots
+                wait_time = (1.0 - self.__tokens) / self.__rate if self.__rate and self.__tokens < 1.0 else None
+                if give_up_at is not None:
+                    remaining_time = give_up_at - time.monotonic()
+                    if remaining_time <= 0:
+                        return False
+                    wait_time = remaining_time if wait_time is None else min(wait_time, remaining_time)
+                self.__condition.wait(wait_time)
+
+    def release(self, latency: Optional[float], status_code: Optional[int] = None):
+        # latency is None for calls whose duration depends on the size of what they transfer, e.g. uploads
+        with self.__condition:
+            self.__in_flight -= 1
+            if status_code in [None, 429, 503] or (latency is not None and latency > self.target_latency):
+                self.__decrease()
+            elif status_code < 500:
+                self.__increase()
+            self.__condition.notify_all()
+
+    def cancel(self):
+        # Gives back the slot of a call without adjusting the limits
+        with self.__condition:
+            self.__in_flight -= 1
+            self.__condition.notify_all()
+
+    def __refill(self) -> float:
+        now = time.monotonic()
+        if self.__rate is not None:
+            # The bucket holds at most one second worth of tokens
+            self.__tokens = min(max(1.0, self.__rate), self.__tokens + (now - self.__refilled_at) * self.__rate)
+        self.__refilled_at = now
+        return now
+
+    def __increase(self):
+        # Concurrency grows by one per window of successful calls, the rate by one call/sec per successful call
+        self.__concurrency = min(
+            float(self.max_concurrency), self.__concurrency + self.additive_increase / self.__concurrency
+        )
+        if self.__rate is not None:
+            self.__rate += self.additive_increase
+            if self.__rate > self.max_rate:
+                self.__rate = None
+
+    def __decrease(self):
+        now = time.monotonic()
+        # Responses to requests sent before the previous decrease reflect the old limits, do not punish them twice
+        if now - self.__decreased_at < self.cooldown:
+            return
+        self.__decreased_at = now
+        self.__decreases += 1
+        self.__concurrency = max(float(self.min_concurrency), self.__concurrency * self.multiplicative_decrease)
+        if self.__rate is None:
+            self.__rate = float(len(self.__sent_at))
+            self.__tokens = 0.0
+        self.__rate = max(self.min_rate, self.__rate * self.multiplicative_decrease)
+        self.__logger.info(
+            "Limits decreased to %d concurrent calls, %.1f calls/sec", int(self.__concurrency), self.__rate
+        )
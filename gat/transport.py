@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+
+import abc
+import json
+import os
+import urllib.parse
+from typing import Any, Callable, Dict, IO, Iterator, List, Mapping, Optional, Tuple, TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from .data import GatApiConfiguration
+
+# Connect and read timeouts in seconds
+Timeout = Tuple[Optional[float], Optional[float]]
+
+
+class GatTransportError(Exception):
+    def __init__(self, message: str, connect_error: bool = False):
+        super().__init__(message)
+        # Set when the request has not reached the server, so that any method is safe to retry
+        self.connect_error = connect_error
+
+
+class GatResponse:
+    # The part of requests.Response used by GatApi, the body is either known or read from chunks on demand
+    def __init__(
+        self,
+        status_code: int,
+        headers: Mapping[str, str],
+        content: Optional[bytes] = None,
+        chunks: Optional[Callable[[int], Iterator[bytes]]] = None,
+        release: Optional[Callable[[], None]] = None,
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.__content = content
+        self.__chunks = chunks
+        self.__release = release
+
+    @property
+    def content(self) -> bytes:
+        if self.__content is None:
+            self.__content = b"".join(self.__chunks(65536)) if self.__chunks else b""
+        return self.__content
+
+    @property
+    def text(self) -> str:
+        _, _, charset = self.headers.get("Content-Type", "").partition("charset=")
+        return self.content.decode(charset.split(";")[0].strip() or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        if self.__content is None and self.__chunks:
+            yield from self.__chunks(chunk_size)
+            return
+        content = self.content
+        for start in range(0, len(content), chunk_size):
+            end = start + chunk_size
+            yield content[start:end]
+
+    def close(self):
+        if self.__release:
+            self.__release()
+
+
+class GatTransport(abc.ABC):
+    # Sends a request and returns a response with status_code, headers, content, text, json(), iter_content() and
+    # close(), like requests.Response or GatResponse; failures to get a response raise GatTransportError
+    @abc.abstractmethod
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Timeout,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], IO[bytes]]] = None,
+        files: Optional[List[Tuple[str, IO]]] = None,
+        stream: bool = False,
+    ) -> Any:
+        pass
+
+    def close(self):
+        pass
+
+
+def default_headers(configuration: "GatApiConfiguration") -> Dict[str, str]:
+    headers = {"User-Agent": "gat.py", "X-Api-Key": configuration.key}
+    if not configuration.keep_alive:
+        headers["Connection"] = "close"
+    return headers
+
+
+def encode_body(
+    headers: Dict[str, str],
+    json_data: Optional[Dict[str, Any]],
+    data: Optional[Union[Dict[str, Any], IO[bytes]]],
+    files: Optional[List[Tuple[str, IO]]],
+) -> Tuple[Optional[Union[bytes, IO[bytes]]], Dict[str, str]]:
+    # Same encoding as requests: fields set to None are left out and explicit Content-Type headers are kept
+    import urllib3
+
+    headers = dict(headers)
+    if data is not None and hasattr(data, "read"):
+        # File-like bodies, e.g. GatMultipartEncoder, are streamed as they are, with Content-Type set by the caller
+        if hasattr(data, "__len__"):
+            headers["Content-Length"] = str(len(data))
+        return data, headers
+    has_content_type = any(name.lower() == "content-type" for name in headers)
+    fields = [(name, value) for name, value in (data or {}).items() if value is not None]
+    if files:
+        fields += [(name, (os.path.basename(file.name), file.read())) for name, file in files]
+        body, content_type = urllib3.encode_multipart_formdata(fields)
+    elif data:
+        body, content_type = urllib.parse.urlencode(fields).encode("utf-8"), "application/x-www-form-urlencoded"
+    elif json_data is not None:
+        body, content_type = json.dumps(json_data).encode("utf-8"), "application/json"
+    else:
+        return None, headers
+    if not has_content_type or files:
+        headers["Content-Type"] = content_type
+    return body, headers
+
+
+class GatRequestsTransport(GatTransport):
+    # The default, uses the session of the configuration
+    def __init__(self, configuration: "GatApiConfiguration"):
+        self.__configuration = configuration
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Timeout,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], IO[bytes]]] = None,
+        files: Optional[List[Tuple[str, IO]]] = None,
+        stream: bool = False,
+    ) -> Any:
+        import requests
+
+        try:
+            response = self.__configuration.session.request(
+                method, url, headers=headers, timeout=timeout, json=json, data=data, files=files, stream=stream
+            )
+        except requests.exceptions.RequestException as error:
+            raise GatTransportError(str(error), self.__is_connect_error(error)) from error
+        if not stream:
+            return response
+        # The body is read later, its failures have to be raised as GatTransportError as well
+        return GatResponse(
+            response.status_code,
+            response.headers,
+            chunks=lambda chunk_size: self.__read(response, chunk_size),
+            release=response.close,
+        )
+
+    def close(self):
+        self.__configuration.session.close()
+
+    @staticmethod
+    def __read(response: Any, chunk_size: int) -> Iterator[bytes]:
+        import requests
+
+        try:
+            yield from response.iter_content(chunk_size)
+        except requests.exceptions.RequestException as error:
+            raise GatTransportError(str(error)) from error
+
+    @staticmethod
+    def __is_connect_error(error: Exception) -> bool:
+        import requests
+        import urllib3
+
+        # Failures to connect or to send the request mean the server has not seen it
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(error, requests.exceptions.ConnectionError) and isinstance(
+            reason, urllib3.exceptions.NewConnectionError
+        )
+
+
+class GatUrllib3Transport(GatTransport):
+    # A connection pool without the session layer of requests, which saves per-call overhead
+    def __init__(self, configuration: "GatApiConfiguration"):
+        import urllib3
+
+        self.__headers = default_headers(configuration)
+        self.__pool = urllib3.PoolManager(
+            num_pools=configuration.pool_connections,
+            maxsize=configuration.pool_maxsize,
+            block=configuration.pool_block,
+            retries=False,
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Timeout,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], IO[bytes]]] = None,
+        files: Optional[List[Tuple[str, IO]]] = None,
+        stream: bool = False,
+    ) -> Any:
+        import urllib3
+
+        body, headers = encode_body(dict(self.__headers, **headers), json, data, files)
+        try:
+            response = self.__pool.request(
+                method,
+                url,
+                body=body,
+                headers=headers,
+                timeout=urllib3.Timeout(connect=timeout[0], read=timeout[1]),
+                preload_content=not stream,
+                redirect=False,
+            )
+        except urllib3.exceptions.HTTPError as error:
+            raise GatTransportError(str(error), isinstance(error, urllib3.exceptions.ConnectTimeoutError)) from error
+        if not stream:
+            return GatResponse(response.status, response.headers, response.data)
+        return GatResponse(
+            response.status,
+            response.headers,
+            chunks=lambda chunk_size: self.__read(response, chunk_size),
+            release=response.release_conn,
+        )
+
+    def close(self):
+        self.__pool.clear()
+
+    @staticmethod
+    def __read(response: Any, chunk_size: int) -> Iterator[bytes]:
+        import urllib3
+
+        try:
+            yield from response.stream(chunk_size)
+        except urllib3.exceptions.HTTPError as error:
+            raise GatTransportError(str(error)) from error
+
+
+class GatHttpxTransport(GatTransport):
+    # Multiplexes concurrent calls over one HTTP/2 connection when the server supports it
+    def __init__(self, configuration: "GatApiConfiguration", http2: bool = True):
+        # httpx is an optional dependency, install with the "http2" extra
+        import httpx
+
+        self.__client = httpx.Client(
+            headers=default_headers(configuration),
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=configuration.pool_maxsize,
+                max_keepalive_connections=configuration.pool_maxsize if configuration.keep_alive else 0,
+            ),
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: Timeout,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], IO[bytes]]] = None,
+        files: Optional[List[Tuple[str, IO]]] = None,
+        stream: bool = False,
+    ) -> Any:
+        import httpx
+
+        body, headers = encode_body(headers, json, data, files)
+        connect_timeout, read_timeout = timeout
+        try:
+            response = self.__client.send(
+                self.__client.build_request(
+                    method,
+                    url,
+                    content=body,
+                    headers=headers,
+                    timeout=httpx.Timeout(None, connect=connect_timeout, read=read_timeout, pool=connect_timeout),
+                ),
+                stream=stream,
+            )
+        except httpx.HTTPError as error:
+            connect_error = isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+            raise GatTransportError(str(error), connect_error) from error
+        if not stream:
+            return GatResponse(response.status_code, response.headers, response.content)
+        return GatResponse(
+            response.status_code,
+            response.headers,
+            chunks=lambda chunk_size: self.__read(response, chunk_size),
+            release=response.close,
+        )
+
+    def close(self):
+        self.__client.close()
+
+    @staticmethod
+    def __read(response: Any, chunk_size: int) -> Iterator[bytes]:
+        import httpx
+
+        try:
+            yield from response.iter_bytes(chunk_size)
+        except httpx.HTTPError as error:
+            raise GatTransportError(str(error)) from error
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple, Union
+
+# Called with the number of bytes sent so far and the total size of the request body
+Progress = Callable[[int, int], None]
+
+
+class GatBandwidthLimiter:
+    # Token bucket shared by all uploads using it, so that the limit applies to all of them together
+    def __init__(self, bytes_per_second: float, burst: Optional[float] = None):
+        self.bytes_per_second = bytes_per_second
+        self.burst = burst or max(bytes_per_second / 4, 65536.0)
+        self.__tokens = self.burst
+        self.__refilled_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self, size: int):
+        # Tokens are taken up front and may go negative, the caller then waits until the debt is paid off
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__refilled_at) * self.bytes_per_second)
+            self.__refilled_at = now
+            self.__tokens -= size
+            delay = -self.__tokens / self.bytes_per_second
+        if delay > 0:
+            time.sleep(delay)
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as build_file:
+        for chunk in iter(lambda: build_file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GatUploadIndex:
+    # Maps SHA-256 of uploaded files to native builds created from them, per API root, key and application; entries
+    # are only hints, which have to be checked against the builds of the application before use
+    def __init__(self, path: str):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__logger = logging.getLogger("gat.GatUploadIndex")
+
+    @staticmethod
+    def scope(uri: str, api_key: str, application_id: str) -> str:
+        return hashlib.sha256("\0".join([uri, api_key, application_id]).encode("utf-8")).hexdigest()
+
+    def get(self, scope: str, digest: str) -> Optional[str]:
+        with self.__lock:
+            entry = self.__load().get(scope, {}).get(digest)
+        return entry["id"] if entry else None
+
+    def has_size(self, scope: str, size: int) -> bool:
+        # Files are only hashed up front when a build of the same size has been uploaded before
+        with self.__lock:
+            return any(entry["size"] == size for entry in self.__load().get(scope, {}).values())
+
+    def put(self, scope: str, digest: str, build_id: str, size: int):
+        with self.__lock:
+            entries = self.__load()
+            entries.setdefault(scope, {})[digest] = {"id": build_id, "size": size}
+            self.__store(entries)
+
+    def remove(self, scope: str, digest: str):
+        with self.__lock:
+            entries = self.__load()
+            if entries.get(scope, {}).pop(digest, None) is not None:
+                self.__store(entries)
+
+    def __load(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+
+    def __store(self, entries: Dict[str, Dict[str, Dict[str, Any]]]):
+        import tempfile
+
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            handle, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(handle, "w", encoding="utf-8") as index_file:
+                json.dump(entries, index_file)
+            os.replace(temporary_path, self.path)
+        except OSError as error:
+            self.__logger.warning("Unable to store upload index %s: %s", self.path, error)
+
+
+class GatMultipartEncoder:
+    # A multipart/form-data body read from the files as it is sent, so memory use does not depend on their size; it
+    # can be rewound with seek(0) when the request is retried. SHA-256 of each file is computed on the way and stored
+    # in file_digests once the file has been read in full
+    def __init__(
+        self,
+        fields: Dict[str, Any],
+        files: List[Tuple[str, str]],
+        progress: Optional[Progress] = None,
+        bandwidth_limiter: Optional[GatBandwidthLimiter] = None,
+        chunk_size: int = 65536,
+    ):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.progress = progress
+        self.bandwidth_limiter = bandwidth_limiter
+        self.chunk_size = chunk_size
+        # Fields set to None are left out, like requests does
+        self.__parts: List[Union[bytes, str]] = []
+        for name, value in fields.items():
+            if value is not None:
+                self.__parts.append(self.__header(name) + f"\r\n{value}\r\n".encode("utf-8"))
+        for name, path in files:
+            filename = os.path.basename(path)
+            self.__parts.append(
+                self.__header(name, f'; filename="{filename}"') + b"Content-Type: application/octet-stream\r\n\r\n"
+            )
+            self.__parts.append(path)
+            self.__parts.append(b"\r\n")
+        self.__parts.append(f"--{self.boundary}--\r\n".encode("ascii"))
+        self.__length = sum(len(part) if isinstance(part, bytes) else os.path.getsize(part) for part in self.__parts)
+        self.__index = 0
+        self.__offset = 0
+        self.__position = 0
+        self.__file: Optional[IO[bytes]] = None
+        self.__file_digest = hashlib.sha256()
+        self.file_digests: Dict[str, str] = {}
+
+    def __header(self, name: str, parameters: str = "") -> bytes:
+        disposition = f'Content-Disposition: form-data; name="{name}"{parameters}\r\n'
+        return f"--{self.boundary}\r\n{disposition}".encode("utf-8")
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def __enter__(self) -> "GatMultipartEncoder":
+        return self
+
+    def __exit__(self, *args: Any):
+        self.close()
+
+    def tell(self) -> int:
+        return self.__position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if (offset, whence) not in [(0, os.SEEK_SET), (0, os.SEEK_END)]:
+            raise ValueError("Only the start and the end of the body can be sought")
+        self.close()
+        self.file_digests = {}
+        if whence == os.SEEK_SET:
+            self.__index, self.__offset, self.__position = 0, 0, 0
+        else:
+            self.__index, self.__offset, self.__position = len(self.__parts), 0, self.__length
+        return self.__position
+
+    def read(self, size: int = -1) -> bytes:
+        size = self.__length - self.__position if size is None or size < 0 else size
+        chunks = []
+        remaining = size
+        while remaining > 0 and self.__index < len(self.__parts):
+            part = self.__parts[self.__index]
+            if isinstance(part, bytes):
+                start, end = self.__offset, self.__offset + remaining
+                chunk = part[start:end]
+            else:
+                if self.__file is None:
+                    self.__file = open(part, "rb")
+                    self.__file_digest = hashlib.sha256()
+                chunk = self.__file.read(remaining)
+                if chunk:
+                    self.__file_digest.update(chunk)
+                else:
+                    self.file_digests[part] = self.__file_digest.hexdigest()
+            if chunk:
+                chunks.append(chunk)
+                remaining -= len(chunk)
+                self.__offset += len(chunk)
+            else:
+                # The current part is finished, files are closed as soon as they have been sent
+                self.close()
+                self.__index += 1
+                self.__offset = 0
+        data = b"".join(chunks)
+        self.__position += len(data)
+        if data and self.bandwidth_limiter:
+            self.bandwidth_limiter.acquire(len(data))
+        if data and self.progress:
+            self.progress(self.__position, self.__length)
+        return data
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+import json
+import time
+from typing import Any, Dict, IO, List, Optional, Tuple, Union
+
+import pytest
+
+import gat
+
+ROOT = "https://api.example.invalid/api/"
+PAGES = 3
+# Recorded response time of each page
+LATENCY = 0.05
+
+
+def _page(number: int) -> bytes:
+    body: Dict[str, Any] = {
+        "data": [{"type": "testCase", "id": str(number), "attributes": {"title": f"Test case {number}"}}],
+        "links": {},
+    }
+    if number < PAGES:
+        body["links"]["next"] = f"/api/v1/applications/1/test_cases?page[number]={number + 1}"
+    return json.dumps(body).encode("utf-8")
+
+
+class _PagesTransport(gat.GatTransport):
+    # Serves test cases in PAGES pages, one test case per page, as if each response took LATENCY; when replaying, any
+    # call reaching it fails the test
+    def __init__(self, replaying: bool = False):
+        self.replaying = replaying
+        self.requests: List[str] = []
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        timeout: gat.transport.Timeout,
+        json: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], IO[bytes]]] = None,
+        files: Optional[List[Tuple[str, IO]]] = None,
+        stream: bool = False,
+    ) -> gat.GatResponse:
+        self.requests.append(url)
+        if self.replaying:
+            pytest.fail(f"{method} {url} was sent during replay")
+        time.sleep(LATENCY)
+        number = int(url.rpartition("page[number]=")[2]) if "page[number]=" in url else 1
+        return gat.GatResponse(200, {"Content-Type": "application/vnd.api+json"}, _page(number))
+
+
+def _api(cassette: gat.GatCassette, metrics: Optional[gat.GatMetrics] = None, **kwargs: Any) -> gat.GatApi:
+    # Every call reaches the cassette, like with --record and --replay
+    configuration = gat.GatApiConfiguration(
+        key="abcd1234efgh", root=ROOT, http_cache=None, cassette=cassette, metrics=metrics, **kwargs
+    )
+    return gat.GatApi(configuration)
+
+
+def _request_count(metrics: gat.GatMetrics) -> int:
+    return sum(stats.count for stats in metrics.summary())
+
+
+@pytest.fixture()
+def cassette_path(tmp_path: Any) -> str:
+    path = str(tmp_path / "test-cases.jsonl.gz")
+    transport = _PagesTransport()
+    with gat.GatCassette(path, mode="record") as cassette:
+        test_cases = _api(cassette, transport_factory=lambda configuration: transport).test_cases(
+            gat.Application(id="1", name="Application", platform_name="web")
+        )
+    assert [test_case.title for test_case in test_cases] == [f"Test case {number}" for number in range(1, PAGES + 1)]
+    assert len(transport.requests) == PAGES
+    return path
+
+
+def _replay(cassette: gat.GatCassette, metrics: gat.GatMetrics) -> List[gat.TestCase]:
+    transport = _PagesTransport(replaying=True)
+    test_cases = _api(cassette, metrics, transport_factory=lambda configuration: transport).test_cases(
+        gat.LazyApplication("1", lambda: pytest.fail("loaded"))
+    )
+    assert transport.requests == []
+    return test_cases
+
+
+def test_replay_makes_recorded_requests_only(cassette_path: str) -> None:
+    metrics = gat.GatMetrics()
+    with gat.GatCassette(cassette_path, mode="replay") as cassette:
+        test_cases = _replay(cassette, metrics)
+
+    assert [(test_case.id, test_case.title) for test_case in test_cases] == [
+        (str(number), f"Test case {number}") for number in range(1, PAGES + 1)
+    ]
+    assert _request_count(metrics) == PAGES
+    assert all(stats.errors == 0 and stats.retries == 0 for stats in metrics.summary())
+
+
+def test_replay_latency_keeps_recorded_response_times(cassette_path: str) -> None:
+    metrics = gat.GatMetrics()
+    with gat.GatCassette(cassette_path, mode="replay", replay_latency=True) as cassette:
+        test_cases = _replay(cassette, metrics)
+
+    assert len(test_cases) == _request_count(metrics) == PAGES
+    # Each replayed response waits at least as long as the recorded one took, which took at least LATENCY
+    assert all(stats.p50 >= LATENCY for stats in metrics.summary())
+
+
+def test_replay_fails_for_unrecorded_request(cassette_path: str) -> None:
+    transport = _PagesTransport(replaying=True)
+    with gat.GatCassette(cassette_path, mode="replay") as cassette:
+        with pytest.raises(gat.GatError, match="is not recorded"):
+            _api(cassette, transport_factory=lambda configuration: transport).test_cases(
+                gat.Application(id="2", name="Other", platform_name="web")
+            )
+    assert transport.requests == []
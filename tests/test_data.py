@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import gat
+
+
+def _unloadable() -> gat.Application:
+    pytest.fail("the application was loaded")
+
+
+def test_lazy_application_matches_loaded_application_in_sets_and_dicts() -> None:
+    loaded = gat.Application(id="1", name="Application", platform_name="web")
+    lazy = gat.LazyApplication("1", _unloadable)
+
+    assert lazy == loaded and loaded == lazy
+    assert hash(lazy) == hash(loaded)
+    assert lazy in {loaded} and loaded in {lazy}
+    assert {loaded: "loaded"}[lazy] == "loaded"
+    assert {lazy: "lazy"}[loaded] == "lazy"
+    assert len({loaded, lazy, gat.LazyApplication("1", _unloadable)}) == 1
+
+
+def test_applications_with_other_ids_differ() -> None:
+    loaded = gat.Application(id="1", name="Application", platform_name="web")
+    lazy = gat.LazyApplication("2", _unloadable)
+
+    assert lazy != loaded and loaded != lazy
+    assert lazy not in {loaded}
+    assert len({loaded, lazy}) == 2
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import pytest
+
+from gat.metrics import endpoint_name
+
+# Organization ID from the README, IDs are opaque strings
+OPAQUE_ID = "qFS3RrkAE8K5vF1-U43ICPRnlJCfmnNwX3scTLmmG4w="
+
+
+@pytest.mark.parametrize(
+    "method, path, name",
+    [
+        ("GET", "whoami", "GET whoami"),
+        ("GET", "applications", "GET applications"),
+        ("GET", f"applications/{OPAQUE_ID}/test_cases?page[number]=2", "GET applications/{id}/test_cases"),
+        (
+            "GET",
+            f"applications/{OPAQUE_ID}/test_case_runs_batches/batch-{OPAQUE_ID}/test_case_runs",
+            "GET applications/{id}/test_case_runs_batches/{id}/test_case_runs",
+        ),
+        (
+            "GET",
+            "applications/app0/test_case_runs_batches/b1/summary",
+            "GET applications/{id}/test_case_runs_batches/{id}/summary",
+        ),
+        ("POST", f"applications/{OPAQUE_ID}/test_cases/import", "POST applications/{id}/test_cases/import"),
+        ("DELETE", f"applications/{OPAQUE_ID}/test_cases/delete_all", "DELETE applications/{id}/test_cases/delete_all"),
+        (
+            "DELETE",
+            "applications/1/native_application_builds/abc",
+            "DELETE applications/{id}/native_application_builds/{id}",
+        ),
+    ],
+)
+def test_endpoint_name_replaces_ids_only(method: str, path: str, name: str) -> None:
+    assert endpoint_name(method, path) == name
+
+
+def test_endpoint_name_groups_calls_to_different_applications() -> None:
+    assert endpoint_name("GET", f"applications/{OPAQUE_ID}/environments") == endpoint_name(
+        "GET", "applications/other-application/environments"
+    )
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import gat
+from gat import data
+
+
+def _test_case(id: str, title: str, importance: str, section: str, content: str) -> data.TestCase:
+    return data.TestCase(
+        id=id,
+        title=title,
+        importance=importance,
+        section=section,
+        instructions=[data.TestCaseInstruction(id="new", content=content, assertion=False)],
+    )
+
+
+def test_attributes_missing_from_listing_are_not_compared() -> None:
+    listed = [
+        data.TestCase(id="1", title="Sign in", importance=None, section=None, instructions=[]),
+        data.TestCase(id="2", title="Sign out", importance=None, section=None, instructions=[]),
+    ]
+    local = [
+        _test_case("", "Sign in", "High", "Account", "Sign in"),
+        _test_case("", "Pay by card", "Medium", "Checkout", "Pay"),
+    ]
+
+    plan = gat.sync.plan_sync(listed, local, {"instructions", "importance", "section"})
+
+    assert plan.ignored == ("importance", "section", "instructions")
+    assert [test_case.id for test_case in plan.unchanged] == ["1"]
+    assert [test_case.title for test_case in plan.create] == ["Pay by card"]
+    assert [test_case.id for test_case in plan.delete] == ["2"]
+    assert plan.replaced_keys == []
+
+
+def test_listed_attributes_are_still_compared() -> None:
+    listed = [data.TestCase(id="1", title="Sign in", importance="Low", section=None, instructions=[])]
+    local = [_test_case("", "Sign in", "High", "Account", "Sign in")]
+
+    plan = gat.sync.plan_sync(listed, local, {"section", "instructions"})
+
+    assert [test_case.id for test_case in plan.delete] == ["1"]
+    assert plan.replaced_keys == [("", "Sign in")]
+
+
+def test_titles_must_be_unique_without_sections() -> None:
+    local = [
+        _test_case("", "Sign in", "High", "Account", "Sign in"),
+        _test_case("", "Sign in", "High", "Admin", "Sign in"),
+    ]
+
+    with pytest.raises(gat.GatError, match="sections cannot tell them apart"):
+        gat.sync.plan_sync([], local, {"section"})
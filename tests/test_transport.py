@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import http.server
+import threading
+from typing import Any, Callable, Iterator
+
+import pytest
+
+import gat
+
+
+class _TruncatingHandler(http.server.BaseHTTPRequestHandler):
+    # Announces a longer body than it sends, then closes the connection
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.api+json")
+        self.send_header("Content-Length", "65536")
+        self.end_headers()
+        self.wfile.write(b'{"data": [{"type": "testCaseRun", "id": "1"')
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, *args: Any):
+        pass
+
+
+@pytest.fixture()
+def truncating_root() -> Iterator[str]:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _TruncatingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/api/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _transport_factories() -> Iterator[Any]:
+    yield pytest.param(gat.GatRequestsTransport, id="requests")
+    yield pytest.param(gat.GatUrllib3Transport, id="urllib3")
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        return
+    yield pytest.param(lambda configuration: gat.GatHttpxTransport(configuration, http2=False), id="httpx")
+
+
+@pytest.mark.parametrize("transport_factory", list(_transport_factories()))
+def test_truncated_streamed_body_fails_with_gat_error(
+    truncating_root: str, transport_factory: Callable[[gat.GatApiConfiguration], gat.GatTransport]
+) -> None:
+    configuration = gat.GatApiConfiguration(
+        key="abcd1234efgh",
+        root=truncating_root,
+        http_cache=None,
+        retry=gat.GatRetryPolicy(max_attempts=1),
+        transport_factory=transport_factory,
+    )
+    application = gat.Application(id="1", name="Application", platform_name="web")
+    test_case_runs = gat.GatApi(configuration).iter_test_case_runs(application, "1", None, None, None, stream=True)
+
+    with pytest.raises(gat.GatError, match="Call failed"):
+        list(test_case_runs)